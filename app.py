@@ -1,194 +1,82 @@
 import os
-import subprocess
-import sys
-
-# --- CRITICAL: AUTO-INSTALL PLAYWRIGHT BROWSER ---
-# This forces Streamlit Cloud to download the browser binary on startup.
-try:
-    print("⬇️ Installing Playwright Chromium...")
-    subprocess.check_call([sys.executable, "-m", "playwright", "install", "chromium"])
-    print("✅ Browser installed!")
-except Exception as e:
-    print(f"❌ Error installing browser: {e}")
-# ------------------------------------------------
+import re
 import streamlit as st
-import time
-import base64
-from datetime import datetime
-from bs4 import BeautifulSoup
-from playwright.sync_api import sync_playwright
-import PIL.Image
-import ddddocr
-
-# --- PATCH FOR PILLOW/DDDDOCR CONFLICT ---
-if not hasattr(PIL.Image, 'ANTIALIAS'):
-    PIL.Image.ANTIALIAS = PIL.Image.LANCZOS
+import job_queue
+# Heavy modules (playwright, ddddocr, bs4, requests) are imported only when
+# needed: Streamlit re-executes this script on every interaction. Fetching
+# itself runs in a job_runner process, so reruns and closed tabs don't stop it.
 
 # --- CONFIG ---
-URL = "https://hcservices.ecourts.gov.in/hcservices/main.php"
-MAX_RETRIES = 5
+# Parallel browser contexts (or HTTP sessions), each pulling cases from a shared queue
+WORKERS = 3
+# Seconds between progress refreshes while a job is queued or running
+POLL_SECS = 2
+# Log lines shown for the selected job
+LOG_LINES = 300
+
+# Fetch engines (by job_runner engine name): warm headless Chromium slots, or
+# plain HTTP calls to the same endpoints the form uses (far lighter on memory/CPU)
+ENGINES = {
+    "Browser (Playwright)": "browser",
+    "HTTP (no browser)": "http",
+}
+
+# Which orders of each case to download (order_download.ORDER_MODES)
+ORDER_MODES = {
+    "Latest order": "latest",
+    "All new orders": "new",
+    "Full history": "all",
+}
 
 CASES_TO_CHECK = [
     {"name": "Second Appeal", "value": "4", "no": "508", "year": "1999"},
-    {"name": "Writ Petition", "value": "1", "no": "11311", "year": "2025"}
+    {"name": "Civil Writ Petition", "value": "1", "no": "11311", "year": "2025"}
 ]
 
 # --- SESSION STATE ---
-if 'results' not in st.session_state:
-    st.session_state.results = [] 
-if 'logs' not in st.session_state:
-    st.session_state.logs = []
+if 'job' not in st.session_state:
+    st.session_state.job = None  # job shown; None: the latest
+if 'shown' not in st.session_state:
+    st.session_state.shown = None  # (job, status) the page was last fully drawn for
 
 # --- HELPER FUNCTIONS ---
-def update_terminal(message, placeholder):
-    now = datetime.now().strftime("%H:%M:%S")
-    st.session_state.logs.append(f"[{now}] {message}")
-    placeholder.code("\n".join(st.session_state.logs), language="bash")
-
-def solve_captcha(page):
-    try:
-        page.wait_for_selector("#captcha_image", state="visible", timeout=3000)
-        time.sleep(1)
-        captcha_img = page.locator("#captcha_image")
-        captcha_bytes = captcha_img.screenshot()
-        ocr = ddddocr.DdddOcr(show_ad=False)
-        code = ocr.classification(captcha_bytes)
-        return code if len(code) == 6 else ""
-    except: return ""
-
-def get_latest_order_link(html_content):
-    soup = BeautifulSoup(html_content, "html.parser")
-    table = soup.find("table", class_="order_table")
-    if not table: return None, None
-    orders = []
-    for row in table.find_all("tr")[1:]:
-        cols = row.find_all("td")
-        if len(cols) < 5: continue
-        date_text = cols[3].get_text(strip=True)
-        link_tag = cols[4].find("a")
-        if date_text and link_tag:
-            try:
-                dt_obj = datetime.strptime(date_text, "%d-%m-%Y")
-                orders.append((dt_obj, link_tag.get("href")))
-            except: continue
-    if not orders: return None, None
-    orders.sort(key=lambda x: x[0], reverse=True)
-    return orders[0][0].strftime("%d-%m-%Y"), orders[0][1]
-
-def run_batch_process(cases, terminal_placeholder):
-    st.session_state.results = []
-    st.session_state.logs = []
-    
-    with sync_playwright() as p:
-        update_terminal("🚀 Starting Robot...", terminal_placeholder)
-        
-        # --- FIX 1: MEMORY OPTIMIZATION ARGS ---
-        # These flags prevent the browser from crashing on Streamlit Cloud
-        browser = p.chromium.launch(
-            headless=True,
-            args=[
-                '--no-sandbox',
-                '--disable-dev-shm-usage',  # Crucial for Cloud
-                '--disable-gpu'
-            ]
-        )
-        context = browser.new_context(user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
-        page = context.new_page()
-
-        for case in cases:
-            case_label = f"{case['name']} {case['no']}/{case['year']}"
-            update_terminal(f"\n📂 PROCESSING: {case_label}", terminal_placeholder)
-            
-            success = False
-            for attempt in range(1, MAX_RETRIES + 1):
-                try:
-                    # ... (Navigation and Form Filling code remains the same) ...
-                    # COPY YOUR EXISTING NAVIGATION/FORM FILLING LOGIC HERE
-                    # OR USE THE FULL SCRIPT BELOW
-                    
-                    try: page.goto(URL, timeout=60000)
-                    except: continue
-
-                    page.locator("#leftPaneMenuCS").click()
-                    try:
-                        page.wait_for_timeout(1000)
-                        if page.locator("button[data-bs-dismiss='modal']").is_visible():
-                            page.locator("button[data-bs-dismiss='modal']").click()
-                    except: pass
-
-                    page.select_option("#sess_state_code", value="1")
-                    page.wait_for_timeout(1000)
-                    page.select_option("#court_complex_code", value="1")
-                    page.wait_for_timeout(1000)
-
-                    if page.locator("#CScaseNumber").is_visible():
-                        page.locator("#CScaseNumber").click()
-
-                    page.select_option("#case_type", value=case['value'])
-                    page.locator("#search_case_no").fill(case['no'])
-                    page.locator("#rgyear").fill(case['year'])
-
-                    # Captcha Logic
-                    code = solve_captcha(page)
-                    if not code:
-                        update_terminal("⚠️ Captcha blurry. Reloading...", terminal_placeholder)
-                        continue
-                    
-                    page.locator("#captcha").fill(code)
-                    page.locator("#goResetDiv input[value='Go']").click()
-                    
-                    try: page.wait_for_selector("#dispTable, text=Invalid Captcha", timeout=15000)
-                    except: continue
-
-                    if page.locator("text=Invalid Captcha").is_visible():
-                        update_terminal("❌ Invalid Captcha. Retrying...", terminal_placeholder)
-                        time.sleep(2)
-                        continue
-                    
-                    # Extract Result
-                    page.locator("#dispTable a[onclick*='viewHistory']").first.click()
-                    page.wait_for_selector(".order_table", state="visible", timeout=20000)
-                    
-                    date_str, rel_link = get_latest_order_link(page.content())
-                    
-                    if date_str:
-                        full_url = f"https://hcservices.ecourts.gov.in/hcservices/{rel_link}"
-                        update_terminal(f"📄 Found Link: {date_str}", terminal_placeholder)
-                        
-                        # --- FIX 2: VALIDATE PDF ---
-                        response = page.request.get(full_url)
-                        
-                        # Check if it is actually a PDF
-                        content_type = response.headers.get("content-type", "")
-                        
-                        if response.status == 200 and "application/pdf" in content_type:
-                            st.session_state.results.append({
-                                "label": f"{case['no']}/{case['year']}",
-                                "desc": f"{case['name']} (Order: {date_str})",
-                                "data": response.body()
-                            })
-                            update_terminal("✅ PDF Downloaded Successfully!", terminal_placeholder)
-                            success = True
-                            break
-                        else:
-                            # It is an error page
-                            update_terminal("⚠️ Website Error: Order listed but file is missing/not uploaded.", terminal_placeholder)
-                            success = True # Stop retrying, the file just isn't there
-                            break
-                    else:
-                        update_terminal("⚠️ No orders found in history.", terminal_placeholder)
-                        success = True
-                        break
-
-                except Exception as e:
-                    update_terminal(f"❌ Error: {e}", terminal_placeholder)
-                    time.sleep(2)
-            
-            if not success: update_terminal(f"❌ Failed all retries for {case_label}", terminal_placeholder)
-            time.sleep(2)
-
-        browser.close()
-        update_terminal("\n🏁 Batch Complete!", terminal_placeholder)
+@st.cache_data(show_spinner=False)
+def load_case_list(data, filename):
+    # Parsed once per uploaded file, not on every rerun
+    import io
+    from case_import import import_cases
+    return import_cases(io.BytesIO(data), filename)
+
+def submit_job(cases, workers=WORKERS, engine="Browser (Playwright)", incremental=False, orders="Latest order"):
+    from job_runner import spawn_worker
+    st.session_state.job = job_queue.shared().submit(cases, ENGINES[engine], workers, incremental, ORDER_MODES[orders])
+    # A worker already draining the queue picks the job up after its current one
+    spawn_worker()
+
+def job_label(job):
+    from datetime import datetime
+    return f"#{job['id']} · {datetime.fromtimestamp(job['created']):%d %b %H:%M} · {job['engine']} · {job['status']}"
+
+def job_active(job):
+    return job is not None and job["status"] in ("queued", "running")
+
+def submit_cnr_job(cases, workers=WORKERS):
+    # Runs in the job_runner process like a fetch: its log and progress show up in the job view
+    from job_runner import spawn_worker
+    st.session_state.job = job_queue.shared().submit(cases, "cnr", workers)
+    spawn_worker()
+
+def cnr_rows(results):
+    return [{"Case": r["label"], "CNR": r["cnr"] or ("Error" if r["cnr"] is False else "Not Found")}
+            for r in results]
+
+def cnr_csv(rows):
+    import csv, io
+    out = io.StringIO()
+    writer = csv.DictWriter(out, ["Case", "CNR"])
+    writer.writeheader()
+    writer.writerows(rows)
+    return out.getvalue()
 
 # --- UI LAYOUT ---
 st.set_page_config(page_title="High Court Bot", page_icon="⚖️", layout="wide")
@@ -196,32 +84,147 @@ st.title("⚖️ High Court Viewer")
 
 col1, col2 = st.columns([1, 1])
 with col1:
+    cases = CASES_TO_CHECK
+    uploaded = st.file_uploader("Case list (CSV/XLSX with Case Type, Case No, Year)", type=["csv", "xlsx"])
+    if uploaded:
+        try:
+            report = load_case_list(uploaded.getvalue(), uploaded.name)
+        except KeyError as e:
+            st.error(str(e))
+            report = None
+        if report:
+            cases = report.cases
+            st.caption(f"✅ {len(report.cases)} cases ready · {report.duplicates} duplicates dropped · "
+                       f"{len(report.errors)} invalid of {report.total} rows")
+            if report.errors:
+                with st.expander(f"⚠️ {len(report.errors)} invalid rows"):
+                    st.dataframe([{"Row": row, "Problem": msg} for row, msg in report.errors], hide_index=True)
+    engine = st.radio("Engine", list(ENGINES), horizontal=True)
+    workers = st.number_input("Parallel workers", min_value=1, max_value=8, value=WORKERS)
+    orders = st.radio("Orders", list(ORDER_MODES), horizontal=True,
+                      help="Download only the newest order, every order not downloaded yet, or every order of each case")
+    incremental = st.checkbox("Only changed since last run", help="Skip cases checked within their refresh interval and show only cases with new orders")
     if st.button("🚀 Fetch & View Orders", type="primary"):
-        run_batch_process(CASES_TO_CHECK, st.empty())
+        submit_job(cases, int(workers), engine, incremental, orders)
+    if st.button("🔖 Resolve CNRs"):
+        submit_cnr_job(cases, int(workers))
+
+queue = job_queue.shared()
+jobs = queue.jobs()
+job_ids = [job["id"] for job in jobs]
+job_id = st.session_state.job if st.session_state.job in job_ids else (job_ids[0] if job_ids else None)
 
 with col2:
     st.markdown("### 📋 Live Logs")
-    terminal_placeholder = st.empty()
+    if jobs:
+        job_id = st.selectbox("Job", job_ids, index=job_ids.index(job_id),
+                              format_func=lambda i: job_label(jobs[job_ids.index(i)]))
+        st.session_state.job = job_id
+
+    # Read-only: polls the job queue while the job is in flight, stops once it is done
+    @st.fragment(run_every=POLL_SECS if job_active(queue.job(job_id)) else None)
+    def job_progress():
+        job = queue.job(job_id)
+        counts = queue.progress(job_id)
+        total = sum(counts.values())
+        finished = total - counts.get("pending", 0)
+        st.progress(finished / total if total else 1.0,
+                    text=f"{job['status'].title()} · {finished}/{total} cases · "
+                         + " · ".join(f"{status} {n}" for status, n in sorted(counts.items())))
+        st.code("\n".join(queue.tail(job_id, LOG_LINES)), language="bash")
+        if not job_active(job) and st.session_state.shown != (job_id, job["status"]):
+            # Finished while polling: redraw the whole page for the report and the orders
+            st.session_state.shown = (job_id, job["status"])
+            st.rerun()
+
+    if job_id is not None:
+        job_progress()
+
+# --- RUN REPORT ---
+job = queue.job(job_id) if job_id is not None else None
+trace = None
+if job and not job_active(job):
+    from tracing import Tracer
+    trace = Tracer.from_jsonl(queue.trace(job_id))
+cnr_job = job is not None and job["engine"] == "cnr"
+if cnr_job and not job_active(job):
+    cnrs = cnr_rows(queue.results(job_id, ("done", "empty", "failed")))
+    with st.expander(f"🔖 CNRs ({len(cnrs)})", expanded=True):
+        st.dataframe(cnrs, hide_index=True)
+        st.download_button("⬇️ CNRs (CSV)", cnr_csv(cnrs), "cnrs.csv", "text/csv")
+if trace and trace.spans:
+    with st.expander("📊 Run report", expanded=False):
+        rate = trace.captcha_success_rate()
+        failures = trace.failures()
+        m1, m2 = st.columns(2)
+        m1.metric("Captcha success", f"{rate:.0%}" if rate is not None else "–")
+        m2.metric("Failed attempts", sum(failures.values()))
+        st.dataframe(trace.summary(), hide_index=True)
+        if failures:
+            st.dataframe([{"Reason": k, "Attempts": v} for k, v in failures.items()], hide_index=True)
+        d1, d2 = st.columns(2)
+        d1.download_button("⬇️ Spans (JSONL)", trace.jsonl(), f"trace-{trace.run}.jsonl", "application/json")
+        d2.download_button("⬇️ Spans (CSV)", trace.csv(), f"trace-{trace.run}.csv", "text/csv")
+
+# --- ORDER SEARCH ---
+MARKDOWN_CHARS = re.compile(r"([\\`*_{}\[\]()<>#+\-.!|~:$])")
+
+def hit_label(hit):
+    return f"{hit['case_name'] or hit['case_type']} {hit['case_no']}/{hit['case_year']} · {hit['order_date']}"
+
+def escape_markdown(text):
+    return MARKDOWN_CHARS.sub(r"\\\1", text)
+
+def hit_snippet(hit):
+    # Order text is untrusted: only the index's ** highlight markers stay markdown
+    return "**".join(escape_markdown(part) for part in hit['snippet'].split("**"))
+
+with st.expander("🔎 Search order text", expanded=False):
+    query = st.text_input("Search", placeholder='adjourned · "specific performance" · rent NEAR(arrears)',
+                          help="Orders are indexed as jobs download them")
+    if query:
+        # Opened on the first search only; the app never extracts text itself
+        import time
+        import order_index
+        index = order_index.shared()
+        start = time.perf_counter()
+        hits = index.search(query)
+        docs, refs = index.stats()
+        st.caption(f"{len(hits)} hits in {(time.perf_counter() - start) * 1000:.0f} ms · "
+                   f"{docs} PDFs ({refs} orders) indexed")
+        for hit in hits:
+            st.markdown(f"**{escape_markdown(hit_label(hit))}** — {hit_snippet(hit)}")
+        if hits:
+            opened = st.selectbox("Open", range(len(hits)), index=None, format_func=lambda i: hit_label(hits[i]),
+                                  placeholder="Open an order…")
+            if opened is not None:
+                if os.path.exists(hits[opened]['path']):
+                    st.pdf(hits[opened]['path'], height=800, key="pdf_search")
+                else:
+                    st.warning("This PDF has been evicted from the order cache. Fetch again to view it.")
 
 # --- PDF VIEWER SECTION ---
-if st.session_state.results:
+results = queue.results(job_id) if job_id is not None and not cnr_job else []
+if results:
     st.markdown("---")
     st.subheader("📑 View Orders")
 
-    # Create Tabs for each result
-    tabs = st.tabs([res['label'] for res in st.session_state.results])
-
-    for i, tab in enumerate(tabs):
-        result = st.session_state.results[i]
-        
-        with tab:
-            st.info(f"**Viewing:** {result['desc']}")
-            
-            # Convert PDF bytes to Base64 for embedding
-            base64_pdf = base64.b64encode(result['data']).decode('utf-8')
-            
-            # Embed PDF using HTML <iframe>
-            pdf_display = f'<iframe src="data:application/pdf;base64,{base64_pdf}" width="100%" height="800" type="application/pdf"></iframe>'
-            st.markdown(pdf_display, unsafe_allow_html=True)
+    # Tab-like selector: only the selected order is rendered on each rerun
+    selected = st.radio("Order", range(len(results)), format_func=lambda i: results[i]['label'],
+                        horizontal=True, label_visibility="collapsed")
+    result = results[selected]
+    case_orders = result.get("orders", [])
+    if len(case_orders) > 1:
+        # Full-history downloads: every order of the case, newest first
+        order = st.selectbox("Case order", range(len(case_orders)), format_func=lambda i: case_orders[i]['desc'])
+        result = case_orders[order]
+        selected = f"{selected}_{order}"
+
+    st.info(f"**Viewing:** {result['desc']}")
+    if os.path.exists(result['path']):
+        # Served from disk through Streamlit's media endpoint, not a data: URI
+        st.pdf(result['path'], height=800, key=f"pdf_{selected}")
+    else:
+        st.warning("This PDF has been evicted from the order cache. Fetch again to view it.")
 
 
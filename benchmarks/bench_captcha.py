@@ -0,0 +1,79 @@
+"""
+Offline accuracy / latency benchmark for the captcha solver.
+
+    python benchmarks/bench_captcha.py [corpus_dir]
+
+Compares the old single-guess solver (raw image, keep only 6-char output)
+with the solver in captcha.py (raw read first, preprocessed variants voted
+on only when it is invalid): how many images would have been submitted,
+how many of those were wrong, and latency per solve; plus top-1 / top-k of
+the candidates over every variant (outside the timings).
+"""
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import captcha
+
+CORPUS = os.path.join(ROOT, "benchmarks", "captcha_corpus")
+
+
+def load_corpus(path):
+    items = []
+    for name in sorted(os.listdir(path)):
+        label, ext = os.path.splitext(name)
+        if ext.lower() not in (".png", ".jpg", ".jpeg", ".gif"): continue
+        with open(os.path.join(path, name), "rb") as f:
+            items.append((label.lower(), f.read()))
+    return items
+
+def p95(values):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * 0.95))]
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else CORPUS
+    corpus = load_corpus(path)
+    if not corpus:
+        print(f"No images in {path}. Record some with CAPTCHA_RECORD_DIR={path}")
+        return
+
+    with captcha.ocr_engine(): pass  # load the model outside the timings
+
+    base_hits = base_submits = 0
+    base_times = []
+    for label, img in corpus:
+        t = time.perf_counter()
+        code = captcha.classify(img)
+        base_times.append(time.perf_counter() - t)
+        if len(code) == captcha.CAPTCHA_LENGTH:
+            base_submits += 1
+            base_hits += code.lower() == label
+
+    top1 = topk = submits = submit_hits = 0
+    times = []
+    for label, img in corpus:
+        t = time.perf_counter()
+        code = captcha.pick(*captcha.vote(img))
+        times.append(time.perf_counter() - t)
+        texts = [text for text, _ in captcha.rank_candidates(img)]
+        top1 += bool(texts) and texts[0] == label
+        topk += label in texts
+        if code:
+            submits += 1
+            submit_hits += code == label
+
+    n = len(corpus)
+    print(f"corpus: {n} images from {path}\n")
+    print(f"{'solver':<10}{'top-1':>8}{'top-k':>8}{'submits':>9}{'wasted':>8}{'p50 ms':>9}{'p95 ms':>9}")
+    print(f"{'baseline':<10}{base_hits / n:>8.1%}{'-':>8}{base_submits:>9}{base_submits - base_hits:>8}"
+          f"{statistics.median(base_times) * 1000:>9.1f}{p95(base_times) * 1000:>9.1f}")
+    print(f"{'ranked':<10}{top1 / n:>8.1%}{topk / n:>8.1%}{submits:>9}{submits - submit_hits:>8}"
+          f"{statistics.median(times) * 1000:>9.1f}{p95(times) * 1000:>9.1f}")
+
+if __name__ == "__main__":
+    main()
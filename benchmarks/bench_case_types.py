@@ -0,0 +1,105 @@
+"""
+Case-type resolution benchmark over messy real-world inputs.
+
+    python benchmarks/bench_case_types.py [--inputs 100000]
+
+Builds inputs the way they arrive from sheets (random case, dotted forms,
+"Cr." prefixes, "CODE - Label", full names, stray spaces, typos) and times
+the old chained str.replace resolver against the precompiled index, cold
+(cache cleared) and warm, plus resolve_many. First checks that every label
+of both maps resolves back to its own case type.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import case_type_map
+from case_type_map import CIVIL_CASE_MAP, CRIMINAL_CASE_MAP
+
+
+def legacy_resolve(case_type_raw):
+    # The resolver as it was before the index, for comparison
+    raw = (case_type_raw or "").strip()
+    is_criminal = raw.lower().startswith("cr")
+    cleaned = raw.replace("Cr.", "").replace("Cr", "").strip()
+    if " - " in cleaned:
+        cleaned = cleaned.split(" - ")[0].strip()
+    cleaned_key = cleaned.replace(".", "").upper()
+    if is_criminal:
+        if cleaned_key in ("CRWP", "CWP", "WP"):
+            return "Criminal Writ Petition"
+        if cleaned_key in CRIMINAL_CASE_MAP:
+            return CRIMINAL_CASE_MAP[cleaned_key]
+        raise ValueError(f"Unknown criminal case type: {cleaned}")
+    if cleaned_key in CIVIL_CASE_MAP:
+        return CIVIL_CASE_MAP[cleaned_key]
+    if cleaned_key.startswith("SA"):
+        return "Second Appeal"
+    if cleaned_key.startswith("WP"):
+        return "Civil Writ Petition"
+    raise ValueError(f"Unknown civil case type: {cleaned}")
+
+def messy(rng):
+    criminal = rng.random() < 0.3
+    code, label = rng.choice(list((CRIMINAL_CASE_MAP if criminal else CIVIL_CASE_MAP).items()))
+    text = rng.choice([code, label, f"{code} - {label}", ".".join(code), code.lower()])
+    if criminal:
+        text = rng.choice(["Cr.", "Cr. ", "CR.", "cr "]) + text
+    if rng.random() < 0.2: text = f"  {text} "
+    if rng.random() < 0.05: text = text + "X"  # typo
+    return text
+
+def check_round_trip():
+    civil_labels = set(CIVIL_CASE_MAP.values())
+    for side, case_map in (("Civil", CIVIL_CASE_MAP), ("Criminal", CRIMINAL_CASE_MAP)):
+        for code, label in case_map.items():
+            # A label both sides share resolves to the civil type unless prefixed
+            prefix = "Cr " if side == "Criminal" and label in civil_labels else ""
+            for text in (label, f"{code} - {label}"):
+                record = case_type_map.lookup_case_type(prefix + text)
+                assert record and (record.side, record.code) == (side, code), \
+                    f"{prefix + text!r} resolves to {record}, not {side} {code}"
+
+def timed(fn, inputs):
+    t = time.perf_counter()
+    ok = 0
+    for raw in inputs:
+        try:
+            ok += fn(raw) is not None
+        except ValueError:
+            pass
+    return time.perf_counter() - t, ok
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--inputs", type=int, default=100000)
+    args = parser.parse_args()
+
+    check_round_trip()
+    rng = random.Random(3)
+    inputs = [messy(rng) for _ in range(args.inputs)]
+    print(f"{len(inputs)} inputs, {len(set(inputs))} distinct\n")
+
+    legacy, legacy_ok = timed(legacy_resolve, inputs)
+    case_type_map.lookup_case_type.cache_clear()
+    cold, ok = timed(case_type_map.lookup_case_type, inputs)
+    warm, _ = timed(case_type_map.lookup_case_type, inputs)
+    case_type_map.lookup_case_type.cache_clear()
+    t = time.perf_counter()
+    case_type_map.resolve_many(inputs)
+    bulk = time.perf_counter() - t
+
+    n = len(inputs)
+    print(f"{'resolver':<26}{'total ms':>10}{'ns/input':>10}{'resolved':>10}")
+    for name, secs, hits in [("legacy str.replace chain", legacy, legacy_ok),
+                             ("index, cold cache", cold, ok), ("index, warm cache", warm, ok),
+                             ("resolve_many", bulk, ok)]:
+        print(f"{name:<26}{secs * 1000:>10.1f}{secs / n * 1e9:>10.0f}{hits:>10}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Regression benchmark for the form-filling flow against a local fixture.
+
+    python benchmarks/bench_form.py [--runs 5] [--xhr-ms 150]
+
+Serves benchmarks/fixtures/ecourts_form.html in place of main.php (via
+page.route, so no network is touched) and times the old fixed-pause flow
+against the event-driven navigation layer in scraper.py, step by step,
+plus follow-up cases on a reused form session (scraper.FormSession).
+Captcha OCR and the PDF download are outside the measured path. Before
+timing, a rejected captcha on the reused form is checked not to fail the
+retry that follows it.
+"""
+import argparse
+import base64
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from playwright.sync_api import sync_playwright
+import scraper
+
+FIXTURE = os.path.join(ROOT, "benchmarks", "fixtures", "ecourts_form.html")
+PNG_1PX = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNkYPhfDwAChwGA60e6kgAAAABJRU5ErkJggg==")
+CASE = {"name": "Second Appeal", "value": "4", "no": "508", "year": "1999"}
+
+
+def serve_fixture(page, xhr_ms):
+    with open(FIXTURE, "rb") as f:
+        html = f.read()
+
+    def handle(route):
+        if "captcha.png" in route.request.url:
+            route.fulfill(body=PNG_1PX, content_type="image/png")
+        else:
+            route.fulfill(body=html, content_type="text/html")
+
+    page.route(scraper.BASE_URL + "**", handle)
+    return f"{scraper.URL}?xhr_ms={xhr_ms}"
+
+def legacy_flow(page, url, timer):
+    # The pre-navigation-layer flow, with its fixed pauses
+    with timer.step("goto"):
+        page.goto(url, timeout=60000)
+    with timer.step("menu"):
+        page.locator("#leftPaneMenuCS").click()
+        page.wait_for_timeout(1000)
+        if page.locator(scraper.MODAL_CLOSE).is_visible():
+            page.locator(scraper.MODAL_CLOSE).click()
+    with timer.step("state"):
+        page.select_option("#sess_state_code", value="1")
+        page.wait_for_timeout(1000)
+    with timer.step("court"):
+        page.select_option("#court_complex_code", value="1")
+        page.wait_for_timeout(1000)
+    with timer.step("case_form"):
+        if page.locator("#CScaseNumber").is_visible():
+            page.locator("#CScaseNumber").click()
+        page.select_option("#case_type", value=CASE['value'])
+        page.locator("#search_case_no").fill(CASE['no'])
+        page.locator("#rgyear").fill(CASE['year'])
+    with timer.step("captcha"):
+        time.sleep(1)
+    scraper.submit_search(page, "abc123", timer)
+    scraper.open_history(page, timer)
+
+def event_flow(page, url, timer):
+    scraper.open_search_form(page, timer, url)
+    scraper.fill_case(page, CASE, timer)
+    with timer.step("captcha"):
+        page.wait_for_selector("#captcha_image", state="visible")
+    scraper.submit_search(page, "abc123", timer)
+    scraper.open_history(page, timer)
+
+def session_flow(page, timer, form):
+    form.open(CASE, timer)
+    scraper.submit_search(page, "abc123", timer)
+    scraper.open_history(page, timer)
+
+def run_session(runs, xhr_ms):
+    """Time `runs` follow-up cases on one page whose form is already configured."""
+    per_step = {}
+    totals = []
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=True, args=scraper.BROWSER_ARGS)
+        page = browser.new_page()
+        scraper.prepare_page(page)
+        url = serve_fixture(page, xhr_ms)
+        scraper.open_search_form(page, scraper.StepTimer(), url)
+        form = scraper.FormSession(page)
+        form.ready = True
+        for _ in range(runs):
+            timer = scraper.StepTimer()
+            session_flow(page, timer, form)
+            for name, secs in timer.steps:
+                per_step.setdefault(name, []).append(secs)
+            totals.append(sum(secs for _, secs in timer.steps))
+        browser.close()
+    return per_step, totals
+
+def check_invalid_captcha(xhr_ms):
+    """A wrong captcha, then a retry on the same form: the stale error must not fail the retry."""
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=True, args=scraper.BROWSER_ARGS)
+        page = browser.new_page()
+        scraper.prepare_page(page)
+        scraper.open_search_form(page, scraper.StepTimer(), serve_fixture(page, xhr_ms))
+        form = scraper.FormSession(page)
+        form.ready = True
+        form.open(CASE, scraper.StepTimer())
+        rejected = scraper.submit_search(page, "badbad", scraper.StepTimer())
+        form.open(CASE, scraper.StepTimer())
+        accepted = scraper.submit_search(page, "abc123", scraper.StepTimer())
+        browser.close()
+    assert not rejected, "invalid captcha not detected"
+    assert accepted, "retry after an invalid captcha read the stale error"
+
+def run(flow, runs, xhr_ms):
+    per_step = {}
+    totals = []
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=True, args=scraper.BROWSER_ARGS)
+        for _ in range(runs):
+            page = browser.new_page()
+            if flow is event_flow: scraper.prepare_page(page)
+            url = serve_fixture(page, xhr_ms)
+            timer = scraper.StepTimer()
+            flow(page, url, timer)
+            for name, secs in timer.steps:
+                per_step.setdefault(name, []).append(secs)
+            totals.append(sum(secs for _, secs in timer.steps))
+            page.close()
+        browser.close()
+    return per_step, totals
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--xhr-ms", type=int, default=150)
+    args = parser.parse_args()
+
+    check_invalid_captcha(args.xhr_ms)
+    legacy = run(legacy_flow, args.runs, args.xhr_ms)
+    event = run(event_flow, args.runs, args.xhr_ms)
+
+    print(f"median ms over {args.runs} runs (simulated XHR {args.xhr_ms} ms)\n")
+    print(f"{'step':<12}{'legacy':>10}{'event':>10}")
+    for name in legacy[0]:
+        old = statistics.median(legacy[0][name]) * 1000
+        new = statistics.median(event[0].get(name, [0])) * 1000
+        print(f"{name:<12}{old:>10.0f}{new:>10.0f}")
+    old, new = statistics.median(legacy[1]) * 1000, statistics.median(event[1]) * 1000
+    print(f"{'total':<12}{old:>10.0f}{new:>10.0f}   ({old / new:.1f}x)")
+
+    session = run_session(args.runs, args.xhr_ms)
+    print("\nfollow-up case on a reused form session\n")
+    for name, secs in session[0].items():
+        print(f"{name:<16}{statistics.median(secs) * 1000:>10.0f}")
+    reused = statistics.median(session[1]) * 1000
+    print(f"{'total':<16}{reused:>10.0f}   ({new / reused:.1f}x vs full reload)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Case-list import benchmark.
+
+    python benchmarks/bench_import.py [--rows 10000]
+
+Writes a messy CSV and XLSX case list (mixed case-type spellings, Excel
+float numbers, duplicates, bad rows) to a temp dir and times
+case_import.import_cases on each. Target: well under a second for 10k rows.
+"""
+import argparse
+import csv
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import case_import
+
+TYPES = ["SA", "WP", "sa", " WP ", "SA - Second Appeal", "W.P.", "Cr.WP", "XYZ"]
+
+
+def make_rows(n):
+    random.seed(7)
+    rows = []
+    for _ in range(n):
+        no = random.randint(1, 20000)
+        year = random.randint(1990, 2025)
+        rows.append([random.choice(TYPES), float(no) if random.random() < 0.3 else str(no),
+                     float(year) if random.random() < 0.3 else str(year)])
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10000)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    headers = ["Case Type", "Case No.", "Year"]
+    tmp = tempfile.mkdtemp()
+
+    csv_path = os.path.join(tmp, "cases.csv")
+    with open(csv_path, "w", newline="") as f:
+        csv.writer(f).writerows([headers] + rows)
+    paths = [csv_path]
+
+    try:
+        from openpyxl import Workbook
+        # Regular (shared-strings) workbook, as Excel itself writes them
+        wb = Workbook()
+        ws = wb.active
+        ws.append(headers)
+        for row in rows: ws.append(row)
+        xlsx_path = os.path.join(tmp, "cases.xlsx")
+        wb.save(xlsx_path)
+        paths.append(xlsx_path)
+    except ImportError:
+        print("openpyxl not installed; skipping XLSX")
+
+    for path in paths:
+        t = time.perf_counter()
+        report = case_import.import_cases(path)
+        secs = time.perf_counter() - t
+        print(f"{os.path.basename(path):<12}{args.rows:>7} rows  {secs * 1000:8.1f} ms   "
+              f"{len(report.cases)} cases, {report.duplicates} duplicates, {len(report.errors)} invalid")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Cost of live-log rendering over a long run: the old update_terminal (re-join
+and redraw the whole log per line) against live_log.LiveLog.
+
+    python benchmarks/bench_log.py [--lines 20000]
+
+A stand-in placeholder counts redraws and the characters each one would
+push to the browser; the log file goes to a temp dir.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("HC_LOG_FILE", os.path.join(tempfile.mkdtemp(), "bench.log"))
+
+import live_log
+
+
+class Placeholder:
+    def __init__(self):
+        self.draws = self.chars = 0
+
+    def code(self, text, language=None):
+        self.draws += 1
+        self.chars += len(text)
+
+def legacy(n, placeholder):
+    logs = []
+    for i in range(n):
+        logs.append(f"[12:00:00] ⏱️ Attempt 1: goto 812ms · captcha 95ms (line {i})")
+        placeholder.code("\n".join(logs), language="bash")
+
+def buffered(n, placeholder):
+    log = live_log.LiveLog(placeholder)
+    for i in range(n):
+        log.write(f"⏱️ Attempt 1: goto 812ms · captcha 95ms (line {i})")
+    log.flush()
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lines", type=int, default=20000)
+    args = parser.parse_args()
+
+    print(f"{'mode':<10}{'seconds':>10}{'redraws':>10}{'MB pushed':>12}")
+    for name, fn in (("legacy", legacy), ("buffered", buffered)):
+        placeholder = Placeholder()
+        start = time.perf_counter()
+        fn(args.lines, placeholder)
+        secs = time.perf_counter() - start
+        print(f"{name:<10}{secs:>10.2f}{placeholder.draws:>10}{placeholder.chars / 1e6:>12.1f}")
+
+if __name__ == "__main__":
+    main()
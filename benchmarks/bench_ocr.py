@@ -0,0 +1,65 @@
+"""
+Micro-benchmark: ddddocr model load cost vs. per-image inference cost.
+
+    python benchmarks/bench_ocr.py [--images 50] [--loads 3]
+
+Shows what the old per-call `DdddOcr()` construction cost on top of each
+classification, and what the pooled engine in captcha.py costs per image.
+"""
+import argparse
+import io
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image, ImageDraw
+import captcha
+
+
+def synthetic_captcha(text):
+    img = Image.new("RGB", (120, 40), "white")
+    draw = ImageDraw.Draw(img)
+    for i, ch in enumerate(text):
+        draw.text((8 + i * 18, 12 + random.randint(-4, 4)), ch, fill="black")
+    for _ in range(6):
+        draw.line([(random.randint(0, 120), random.randint(0, 40)) for _ in range(2)], fill="gray")
+    buf = io.BytesIO()
+    img.save(buf, format="PNG")
+    return buf.getvalue()
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--images", type=int, default=50)
+    parser.add_argument("--loads", type=int, default=3)
+    args = parser.parse_args()
+
+    images = [synthetic_captcha("".join(random.choices(string.ascii_lowercase + string.digits, k=6)))
+              for _ in range(args.images)]
+
+    t = time.perf_counter()
+    for _ in range(args.loads):
+        engine = captcha.new_engine()
+    load = (time.perf_counter() - t) / args.loads
+
+    engine.classification(images[0])  # warm-up
+    t = time.perf_counter()
+    for img in images:
+        engine.classification(img)
+    infer = (time.perf_counter() - t) / len(images)
+
+    t = time.perf_counter()
+    for img in images:
+        captcha.classify(img)
+    pooled = (time.perf_counter() - t) / len(images)
+
+    print(f"model load      : {load * 1000:8.1f} ms")
+    print(f"inference/image : {infer * 1000:8.1f} ms")
+    print(f"pooled/image    : {pooled * 1000:8.1f} ms  (first call includes one load)")
+    print(f"old per-call    : {(load + infer) * 1000:8.1f} ms  -> {(load + infer) / infer:.1f}x slower")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Order-history parsing benchmark over large saved history pages.
+
+    python benchmarks/bench_orders.py [--rows 2000] [--runs 20] [--page FILE]
+
+Compares the old approach (BeautifulSoup html.parser over the whole page,
+collect every row, sort) with order_history.parse_orders + latest_order on
+each available backend. Without --page, a synthetic page is built from the
+recorded history fixture: a long order table (old cases such as SA 508/1999
+have hundreds of rows) inside a page padded with the site's usual markup.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import order_history
+
+ROW = ('<tr><td>{n}</td><td>SA/508/1999</td><td>HON\'BLE JUSTICE X</td><td>{d}</td>'
+       '<td><a href="display_pdf.php?filename=/orders/1999/SA/508/{n}.pdf&caseno=SA/508/1999&cCode=1">View</a></td></tr>')
+PADDING = '<div class="panel"><span class="label">Case detail</span><p>{}</p></div>'
+
+
+def synthetic_page(rows):
+    random.seed(1)
+    table = ["<tr><td>Order Number</td><td>Order on</td><td>Judge</td><td>Order Date</td><td>Order Details</td></tr>"]
+    for n in range(1, rows + 1):
+        d = f"{random.randint(1, 28):02d}-{random.randint(1, 12):02d}-{random.randint(1999, 2025)}"
+        table.append(ROW.format(n=n, d=d))
+    padding = "".join(PADDING.format("x" * 80) for _ in range(rows // 2))
+    return f'<html><body>{padding}<table class="order_table">{"".join(table)}</table>{padding}</body></html>'
+
+def legacy(html_content):
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html_content, "html.parser")
+    table = soup.find("table", class_="order_table")
+    if not table: return None, None
+    orders = []
+    for row in table.find_all("tr")[1:]:
+        cols = row.find_all("td")
+        if len(cols) < 5: continue
+        date_text = cols[3].get_text(strip=True)
+        link_tag = cols[4].find("a")
+        if date_text and link_tag:
+            try:
+                orders.append((datetime.strptime(date_text, "%d-%m-%Y"), link_tag.get("href")))
+            except ValueError: continue
+    if not orders: return None, None
+    orders.sort(key=lambda x: x[0], reverse=True)
+    return orders[0][0].strftime("%d-%m-%Y"), orders[0][1]
+
+def backend(name):
+    parse = {"selectolax": order_history._parse_selectolax, "lxml": order_history._parse_lxml,
+             "stdlib": order_history._parse_stdlib}[name]
+    def run(html_content):
+        latest = order_history.latest_order(parse(order_history.extract_order_table(html_content)))
+        return latest.date_str, latest.link
+    return run
+
+def timed(fn, page, runs):
+    times = []
+    for _ in range(runs):
+        t = time.perf_counter()
+        result = fn(page)
+        times.append(time.perf_counter() - t)
+    return statistics.median(times), result
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--page")
+    args = parser.parse_args()
+
+    if args.page:
+        with open(args.page, encoding="utf-8", errors="replace") as f:
+            page = f.read()
+    else:
+        page = synthetic_page(args.rows)
+
+    candidates = [("bs4 html.parser (old)", legacy)]
+    if order_history._Selectolax: candidates.append(("selectolax", backend("selectolax")))
+    if order_history._lxml: candidates.append(("lxml", backend("lxml")))
+    candidates.append(("stdlib", backend("stdlib")))
+
+    print(f"page {len(page) / 1024:.0f} KiB, {len(order_history.parse_orders(page))} orders, median of {args.runs}\n")
+    base = None
+    for name, fn in candidates:
+        secs, result = timed(fn, page, args.runs)
+        base = base or secs
+        print(f"{name:<24}{secs * 1000:9.2f} ms  {base / secs:6.1f}x   latest={result[0]}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+End-to-end throughput of run_pool (one worker does a whole case) against the
+staged pipeline in pipeline.py, on the HTTP engine and the offline stub.
+
+    python benchmarks/ecourts_stub.py --latency-ms 200 &
+    HC_BASE_URL=http://127.0.0.1:8765/hcservices/ python benchmarks/bench_pipeline.py [--cases 20] [--workers 2]
+
+Each run starts from an empty order cache, so every case downloads its PDF.
+Start the stub with --reject-rate 0.3 to include captcha retries.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def run(mode, cases, workers):
+    # Fresh cache and state per run, so no run benefits from an earlier one
+    tmp = tempfile.mkdtemp()
+    import case_state, order_cache
+    order_cache._shared = order_cache.OrderCache(os.path.join(tmp, "orders"))
+    case_state._shared = case_state.CaseState(os.path.join(tmp, "state.sqlite"))
+
+    from http_engine import http_worker
+    from pipeline import DOWNLOAD_WORKERS, run_cases
+    from scraper import URL
+    from worker_pool import HostGate, NetStats, PipelineStats, run_pool
+
+    # Room for every navigation and download worker, so the host cap isn't what's measured
+    gate = HostGate(workers + DOWNLOAD_WORKERS, 0.0)
+    net = NetStats()
+    stats = PipelineStats()
+    start = time.perf_counter()
+    if mode == "pool":
+        results = run_pool(cases, lambda: http_worker(gate.throttle(URL), net), workers, gate.slot(URL))
+    else:
+        results = run_cases(cases, http_worker, workers, gate.throttle(URL), gate.slot(URL), net, stats)
+    ok = sum(1 for _, result, _ in results if result)
+    elapsed = time.perf_counter() - start
+    return elapsed, ok, stats
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cases", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args()
+    if "HC_BASE_URL" not in os.environ:
+        print("Set HC_BASE_URL to the stub (see the module docstring).")
+        return
+
+    cases = [{"name": "Second Appeal", "value": "4", "no": str(500 + i), "year": "1999"}
+             for i in range(args.cases)]
+    pool_secs, pool_ok, _ = run("pool", cases, args.workers)
+    pipe_secs, pipe_ok, stats = run("pipeline", cases, args.workers)
+
+    print(f"{args.cases} cases, {args.workers} navigation workers\n")
+    print(f"{'mode':<10}{'seconds':>10}{'cases/s':>10}{'ok':>6}")
+    print(f"{'pool':<10}{pool_secs:>10.2f}{args.cases / pool_secs:>10.2f}{pool_ok:>6}")
+    print(f"{'pipeline':<10}{pipe_secs:>10.2f}{args.cases / pipe_secs:>10.2f}{pipe_ok:>6}")
+    print(f"\n{stats.summary()}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Search latency over order text: a linear scan (what opening every PDF
+amounts to, minus the PDF parsing) against the order_index FTS5 index.
+
+    python benchmarks/bench_search.py [--orders 20000] [--words 400]
+
+Orders are synthetic texts from a legal-ish vocabulary, inserted straight
+into a temp index (no PDF extraction); each query runs 20 times.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import order_index
+
+VOCAB = ("appellant respondent counsel court order stand over reply affidavit petition decree rent arrears "
+         "tenancy injunction hearing list notice served granted rejected disposed costs section act code civil "
+         "procedure specific performance suit trial appeal second writ judgment lower bench registry").split()
+RARE = ("adjourned", "contempt", "sine die")
+# FTS5 query -> substrings the scan looks for
+QUERIES = (
+    ("adjourned", ("adjourned",)),
+    ('"specific performance"', ("specific performance",)),
+    ("contempt OR adjourned", ("contempt", "adjourned")),
+)
+
+
+def make_text(rng, words):
+    text = rng.choices(VOCAB, k=words)
+    if rng.random() < 0.05:
+        text.insert(rng.randrange(words), rng.choice(RARE))
+    return " ".join(text)
+
+def timed(fn, runs=20):
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = fn()
+        times.append((time.perf_counter() - start) * 1000)
+    times.sort()
+    return times[len(times) // 2], result
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--orders", type=int, default=20000)
+    parser.add_argument("--words", type=int, default=400)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    texts = [make_text(rng, args.words) for _ in range(args.orders)]
+    index = order_index.OrderIndex(os.path.join(tempfile.mkdtemp(), "index.sqlite"))
+    start = time.perf_counter()
+    with index._db:
+        index._db.executemany("INSERT INTO order_text (sha, body) VALUES (?, ?)",
+                              ((f"{i:064x}", text) for i, text in enumerate(texts)))
+        index._db.executemany("INSERT INTO refs VALUES ('4', ?, '1999', 'Second Appeal', '01-01-2024', ?, '')",
+                              ((str(i), f"{i:064x}") for i in range(len(texts))))
+    print(f"{args.orders} orders x {args.words} words, indexed in {time.perf_counter() - start:.1f}s\n")
+
+    print(f"{'query':<26}{'scan ms':>10}{'fts ms':>10}{'hits':>8}")
+    for query, terms in QUERIES:
+        scan_ms, _ = timed(lambda: [t for t in texts if any(term in t for term in terms)], runs=3)
+        fts_ms, hits = timed(lambda: index.search(query))
+        print(f"{query:<26}{scan_ms:>10.1f}{fts_ms:>10.1f}{len(hits):>8}")
+
+if __name__ == "__main__":
+    main()
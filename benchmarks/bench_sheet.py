@@ -0,0 +1,93 @@
+"""
+Round-trips and wall time for updating a case sheet: the old per-cell
+pattern (4 reads and 3 writes per row, one save at the end) against
+case_sheet.CaseSheet (one read, bulk writes per checkpoint).
+
+    python benchmarks/bench_sheet.py [--rows 2000] [--rtt-ms 1.0]
+
+Runs on the openpyxl backend; every backend call sleeps --rtt-ms to stand
+in for an Excel COM round-trip. CNR lookups are faked.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from openpyxl import Workbook
+import case_sheet
+
+HEADERS = ["Case Type", "Case No", "Year", "CNR", "Status", "Notes"]
+
+
+def make_sheet(path, rows):
+    wb = Workbook()
+    ws = wb.active
+    ws.title = case_sheet.SHEET_NAME
+    ws.append(HEADERS)
+    for i in range(rows):
+        ws.append(["SA", 500 + i, 1999.0, None, "pending", None])
+    wb.save(path)
+
+
+class Latency:
+    """Wraps a backend (or worksheet) so that every call costs one simulated round-trip."""
+
+    def __init__(self, target, rtt):
+        self.target = target
+        self.rtt = rtt
+        self.calls = 0
+
+    def __getattr__(self, name):
+        fn = getattr(self.target, name)
+
+        def call(*args, **kwargs):
+            self.calls += 1
+            time.sleep(self.rtt)
+            return fn(*args, **kwargs)
+        return call
+
+def legacy(path, rows, rtt):
+    backend = case_sheet.OpenpyxlBackend(path)
+    ws = Latency(backend.ws, rtt)
+    for row in range(2, rows + 2):
+        if str(ws.cell(row, 5).value).lower() != "pending": continue
+        ws.cell(row, 1).value, ws.cell(row, 2).value, ws.cell(row, 3).value
+        ws.cell(row, 4, f"CNR{row}")
+        ws.cell(row, 5, "Fetched")
+        ws.cell(row, 6, "")
+    ws.calls += 1
+    time.sleep(rtt)
+    backend.save()
+    return ws.calls
+
+def buffered(path, rows, rtt):
+    backend = Latency(case_sheet.OpenpyxlBackend(path), rtt)
+    sheet = case_sheet.CaseSheet(backend)
+    for row in range(len(sheet.rows)):
+        if str(sheet.value(row, "Status")).lower() != "pending": continue
+        sheet.value(row, "Case Type"), sheet.value(row, "Case No"), sheet.value(row, "Year")
+        sheet.update(row, {"CNR": f"CNR{row + 2}", "Status": "Fetched", "Notes": ""})
+    sheet.flush()
+    return backend.calls
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--rtt-ms", type=float, default=1.0)
+    args = parser.parse_args()
+
+    print(f"{args.rows} pending rows, {args.rtt_ms} ms per round-trip\n")
+    print(f"{'mode':<10}{'calls':>8}{'seconds':>10}")
+    for name, fn in (("per-cell", legacy), ("buffered", buffered)):
+        path = os.path.join(tempfile.mkdtemp(), "cases.xlsx")
+        make_sheet(path, args.rows)
+        start = time.perf_counter()
+        calls = fn(path, args.rows, args.rtt_ms / 1000)
+        print(f"{name:<10}{calls:>8}{time.perf_counter() - start:>10.2f}")
+
+if __name__ == "__main__":
+    main()
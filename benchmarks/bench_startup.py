@@ -0,0 +1,62 @@
+"""
+Startup-time benchmark for the Streamlit script.
+
+    python benchmarks/bench_startup.py [--runs 5] [--app app.py]
+
+Cold: a fresh interpreter executing app.py for the first time (includes
+importing everything it imports at top level). Warm: re-running the script
+in the same process, which is what Streamlit does on every interaction.
+Heavy import costs are listed for reference; none of them should show up
+in either number now that they are deferred until a fetch starts.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+RUNNER = r"""
+import sys, time
+sys.path.insert(0, {root!r})
+from streamlit.testing.v1 import AppTest
+times = []
+for _ in range({reruns}):
+    at = AppTest.from_file({app!r}, default_timeout=120)
+    t = time.perf_counter()
+    at.run()
+    times.append(time.perf_counter() - t)
+print(" ".join(str(x) for x in times))
+"""
+
+IMPORT = "import time; t = time.perf_counter(); import {mod}; print(time.perf_counter() - t)"
+HEAVY = ["playwright.sync_api", "ddddocr", "bs4", "requests"]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--app", default=os.path.join(ROOT, "app.py"))
+    args = parser.parse_args()
+
+    cold, warm = [], []
+    for _ in range(args.runs):
+        out = subprocess.run([sys.executable, "-c", RUNNER.format(root=ROOT, app=args.app, reruns=3)],
+                             cwd=ROOT, capture_output=True, text=True, check=True).stdout
+        times = [float(x) for x in out.split()]
+        cold.append(times[0])
+        warm.extend(times[1:])
+
+    print(f"script execution over {args.runs} fresh processes\n")
+    print(f"cold  median {statistics.median(cold) * 1000:8.1f} ms   max {max(cold) * 1000:8.1f} ms")
+    print(f"warm  median {statistics.median(warm) * 1000:8.1f} ms   max {max(warm) * 1000:8.1f} ms")
+
+    print("\ndeferred imports (fresh process each):")
+    for mod in HEAVY:
+        res = subprocess.run([sys.executable, "-c", IMPORT.format(mod=mod)], capture_output=True, text=True)
+        cost = f"{float(res.stdout) * 1000:8.1f} ms" if res.returncode == 0 else "  not installed"
+        print(f"  {mod:<22}{cost}")
+
+if __name__ == "__main__":
+    main()
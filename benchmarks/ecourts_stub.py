@@ -0,0 +1,129 @@
+"""
+Offline stand-in for hcservices.ecourts.gov.in, serving synthetic fixtures.
+
+    python benchmarks/ecourts_stub.py [--port 8765] [--strict] [--reject-rate 0] [--latency-ms 0]
+    HC_BASE_URL=http://127.0.0.1:8765/hcservices/ streamlit run app.py
+
+Serves main.php (with the PHP session cookie), a rendered captcha image,
+the case type list, the case search and history AJAX endpoints and the
+order PDF, from benchmarks/fixtures/hcservices/. The fixtures are hand-made
+in the site's format, not recorded from it. Any well-formed captcha is
+accepted unless --strict is given, in which case it must match the served
+image; --reject-rate 0.3 answers "Invalid Captcha" to that share of
+well-formed ones anyway, to exercise the retry and requeue paths.
+"""
+import argparse
+import io
+import os
+import random
+import string
+import time
+import uuid
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from PIL import Image, ImageDraw
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+FIXTURES = os.path.join(HERE, "fixtures", "hcservices")
+FORM = os.path.join(HERE, "fixtures", "ecourts_form.html")
+PREFIX = "/hcservices/"
+COOKIE = "HCSERVICES_SESSID"
+
+
+def read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+def render_captcha(text):
+    img = Image.new("L", (60, 20), 255)
+    ImageDraw.Draw(img).text((4, 4), text, fill=0)
+    buf = io.BytesIO()
+    img.resize((180, 60), Image.NEAREST).save(buf, format="PNG")
+    return buf.getvalue()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real site
+    sessions = {}
+    strict = False
+    reject_rate = 0.0
+    latency = 0.0
+
+    def log_message(self, fmt, *args):
+        pass
+
+    def _session(self):
+        cookie = SimpleCookie(self.headers.get("Cookie", ""))
+        sid = cookie[COOKIE].value if COOKIE in cookie else None
+        return sid if sid in self.sessions else None
+
+    def _send(self, body, content_type, status=200, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _form(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return {k: v[0] for k, v in parse_qs(self.rfile.read(length).decode()).items()}
+
+    def do_GET(self):
+        time.sleep(self.latency)
+        path = urlparse(self.path).path[len(PREFIX):]
+        if path == "main.php":
+            sid = uuid.uuid4().hex
+            self.sessions[sid] = None
+            return self._send(read(FORM), "text/html", headers={"Set-Cookie": f"{COOKIE}={sid}; Path=/"})
+        if path == "securimage/securimage_show.php":
+            sid = self._session()
+            if sid is None: return self._send(b"", "image/png", 403)
+            code = "".join(random.choices(string.ascii_lowercase + string.digits, k=6))
+            self.sessions[sid] = code
+            return self._send(render_captcha(code), "image/png")
+        if path == "display_pdf.php":
+            return self._send(read(os.path.join(FIXTURES, "order.pdf")), "application/pdf")
+        self._send(b"Not Found", "text/plain", 404)
+
+    def do_POST(self):
+        time.sleep(self.latency)
+        url = urlparse(self.path)
+        path, action = url.path[len(PREFIX):], parse_qs(url.query).get("action_code", [""])[0]
+        sid = self._session()
+        form = self._form()
+        if sid is None:
+            return self._send(b"<html>Session expired</html>", "text/html")
+        if path == "cases_qry/index_qry.php" and action == "fillCaseType":
+            return self._send(read(os.path.join(FIXTURES, "case_types.txt")), "text/html")
+        if path == "cases_qry/index_qry.php":
+            expected = self.sessions.get(sid)
+            given = form.get("captcha", "")
+            if len(given) != 6 or (self.strict and given != expected) or random.random() < self.reject_rate:
+                return self._send(b"Invalid Captcha", "text/html")
+            return self._send(read(os.path.join(FIXTURES, "search.json")), "application/json")
+        if path == "cases_qry/o_civil_case_history.php":
+            return self._send(read(os.path.join(FIXTURES, "history.html")), "text/html")
+        self._send(b"Not Found", "text/plain", 404)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--strict", action="store_true")
+    parser.add_argument("--reject-rate", type=float, default=0.0, help="share of captchas to reject (0..1)")
+    parser.add_argument("--latency-ms", type=int, default=0)
+    args = parser.parse_args()
+
+    StubHandler.strict = args.strict
+    StubHandler.reject_rate = args.reject_rate
+    StubHandler.latency = args.latency_ms / 1000
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), StubHandler)
+    print(f"eCourts stand-in on http://127.0.0.1:{args.port}{PREFIX}")
+    server.serve_forever()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import os
+import subprocess
+import sys
+from importlib.metadata import version
+
+# Where Playwright keeps its browsers (same default the playwright CLI uses)
+BROWSERS_PATH = os.environ.get("PLAYWRIGHT_BROWSERS_PATH") or os.path.join(
+    os.path.expanduser("~"), ".cache", "ms-playwright")
+MARKER = os.path.join(BROWSERS_PATH, ".hc-bot-chromium")
+LOCK = MARKER + ".lock"
+
+
+def _marker_ok():
+    try:
+        with open(MARKER) as f:
+            return f.read().strip() == version("playwright")
+    except OSError:
+        return False
+
+def _chromium_present():
+    from playwright.sync_api import sync_playwright
+    try:
+        with sync_playwright() as p:
+            return os.path.exists(p.chromium.executable_path)
+    except Exception:
+        return False
+
+class FileLock:
+    """Exclusive lock across processes: one Chromium install, or one job_runner worker, at a time."""
+
+    def __init__(self, path=LOCK):
+        self.path = path
+
+    def acquire(self, blocking=True):
+        """Take the lock; without `blocking`, returns False at once if another process holds it."""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.f = open(self.path, "a+")
+        try:
+            try:
+                import fcntl
+                fcntl.flock(self.f, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except ImportError:
+                import msvcrt
+                msvcrt.locking(self.f.fileno(), msvcrt.LK_LOCK if blocking else msvcrt.LK_NBLCK, 1)
+        except OSError:
+            self.f.close()
+            return False
+        return True
+
+    def release(self):
+        self.f.close()  # closing releases the lock
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+def ensure_chromium():
+    """
+    Make sure Playwright's Chromium is installed, at most once per
+    Playwright version. The fast path is a single marker-file read.
+    """
+    if _marker_ok(): return
+    with FileLock():
+        if _marker_ok(): return  # another session finished it while we waited
+        if not _chromium_present():
+            print("⬇️ Installing Playwright Chromium...")
+            subprocess.check_call([sys.executable, "-m", "playwright", "install", "chromium"])
+            print("✅ Browser installed!")
+        with open(MARKER, "w") as f:
+            f.write(version("playwright"))
@@ -0,0 +1,200 @@
+import os
+import queue
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+from playwright.sync_api import sync_playwright
+from scraper import (BROWSER_ARGS, REUSE_FORM_SESSION, USER_AGENT, CaptchaTap, FormSession, ResourcePolicy,
+                     fetch_case, lookup_case, prepare_page)
+
+# --- CONFIG ---
+WARM_BROWSERS = 3
+# The pool grows to a job's worker count, up to this many browsers
+MAX_BROWSERS = 8
+# Recycle a context after this many cases (cookies/cache/JS heap build up)
+MAX_CONTEXT_USES = 25
+# Relaunch a browser once all warm browsers together grow past this
+MAX_RSS_MB = 2000
+
+
+def _rss_mb(pids):
+    total = 0
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/statm") as f:
+                total += int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError, IndexError):
+            continue
+    return total / (1024 * 1024)
+
+def _child_pids():
+    """PIDs of every process below this one (Linux only; empty elsewhere)."""
+    try:
+        me = os.getpid()
+        parents = {}
+        for entry in os.listdir("/proc"):
+            if not entry.isdigit(): continue
+            try:
+                with open(f"/proc/{entry}/stat") as f:
+                    parents[int(entry)] = int(f.read().rsplit(")", 1)[1].split()[1])
+            except (OSError, ValueError, IndexError):
+                continue
+    except OSError:
+        return []
+    found, frontier = [], [me]
+    while frontier:
+        pid = frontier.pop()
+        kids = [child for child, parent in parents.items() if parent == pid]
+        found.extend(kids)
+        frontier.extend(kids)
+    return found
+
+
+class BrowserSlot(threading.Thread):
+    """
+    One warm Chromium with a ready context, owned by a dedicated thread.
+    The sync Playwright API is bound to the thread that started it, so all
+    browser work for this slot is shipped here via `call()`.
+    """
+
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.jobs = queue.Queue()
+        self.browser = None
+        self.context = None
+        self.uses = 0
+        self.error = None
+        self.start()
+
+    def run(self):
+        try:
+            with sync_playwright() as p:
+                self.playwright = p
+                while True:
+                    job = self.jobs.get()
+                    if job is None: break
+                    fn, future = job
+                    try: future.set_result(fn())
+                    except BaseException as e: future.set_exception(e)
+                self._close_browser()
+        except BaseException as e:
+            # Playwright itself failed; fail whoever is waiting instead of hanging
+            self.error = e
+            while True:
+                try: job = self.jobs.get_nowait()
+                except queue.Empty: break
+                if job: job[1].set_exception(e)
+
+    def submit(self, fn):
+        if self.error: raise RuntimeError(f"Browser slot is down: {self.error}")
+        future = Future()
+        self.jobs.put((fn, future))
+        return future
+
+    def call(self, fn):
+        return self.submit(fn).result()
+
+    def stop(self):
+        self.jobs.put(None)
+
+    # --- slot-thread only ---
+    def _close_browser(self):
+        try:
+            if self.browser: self.browser.close()
+        except Exception:
+            pass
+        self.browser = self.context = None
+
+    def _new_context(self):
+        if self.context:
+            try: self.context.close()
+            except Exception: pass
+        self.context = self.browser.new_context(user_agent=USER_AGENT)
+        self.policy = ResourcePolicy().attach(self.context)
+        self.page = self.context.new_page()
+        prepare_page(self.page)
+        self.tap = CaptchaTap(self.page)
+        self.form = FormSession(self.page) if REUSE_FORM_SESSION else None
+        self.uses = 0
+
+    def _warm(self):
+        if self.browser is None or not self.browser.is_connected():
+            self._close_browser()
+            self.browser = self.playwright.chromium.launch(headless=True, args=BROWSER_ARGS)
+        if self.context is None:
+            self._new_context()
+
+    def _healthy(self):
+        try:
+            return self.browser.is_connected() and self.page.evaluate("1") == 1
+        except Exception:
+            return False
+
+    def _checkout(self):
+        """Health-check, recycling the context or the whole browser if needed."""
+        if self.browser is None or not self._healthy():
+            self._close_browser()
+        elif _rss_mb(_child_pids()) > MAX_RSS_MB:
+            self._close_browser()
+        elif self.uses >= MAX_CONTEXT_USES:
+            self._new_context()
+        self._warm()
+
+    def _fetch(self, case, log, throttle, stats, lookup_only=False):
+        self._checkout()
+        self.policy.stats = stats
+        self.uses += 1
+        fetch = lookup_case if lookup_only else fetch_case
+        return fetch(self.page, case, log, throttle, self.tap, self.form)
+
+
+def _launch(count):
+    """`count` warm slots, launched in parallel; none left running if one fails."""
+    slots = [BrowserSlot() for _ in range(count)]
+    try:
+        for future in [slot.submit(slot._warm) for slot in slots]:
+            future.result()
+    except BaseException:
+        for slot in slots:
+            slot.stop()
+        raise
+    return slots
+
+
+class BrowserManager:
+    """Long-lived pool of warm browser slots, one per job_runner worker process."""
+
+    def __init__(self, size=WARM_BROWSERS):
+        self.free = queue.Queue()
+        self.size = 0
+        self._lock = threading.Lock()
+        self.grow(size)
+
+    def grow(self, size):
+        """Launch slots until the pool has `size` (capped at MAX_BROWSERS); returns the pool size."""
+        with self._lock:
+            size = min(size, MAX_BROWSERS)
+            if size > self.size:
+                for slot in _launch(size - self.size):
+                    self.free.put(slot)
+                self.size = size
+            return self.size
+
+    def _lease(self):
+        slot = self.free.get()
+        if slot.is_alive() and not slot.error: return slot
+        # Its Playwright thread died: hand out a fresh slot in its place
+        try:
+            return _launch(1)[0]
+        except BaseException:
+            self.free.put(slot)
+            raise
+
+    @contextmanager
+    def worker(self, throttle=None, stats=None, lookup_only=False):
+        """Same contract as scraper.browser_worker, but leases a warm slot."""
+        slot = self._lease()
+        try:
+            yield lambda case, log: slot.call(lambda: slot._fetch(case, log, throttle, stats, lookup_only))
+        finally:
+            self.free.put(slot)
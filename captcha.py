@@ -0,0 +1,207 @@
+import io
+import math
+import os
+import queue
+import string
+import threading
+from contextlib import contextmanager
+import PIL.Image
+import PIL.ImageFilter
+import PIL.ImageOps
+
+# --- PATCH FOR PILLOW/DDDDOCR CONFLICT ---
+if not hasattr(PIL.Image, 'ANTIALIAS'):
+    PIL.Image.ANTIALIAS = PIL.Image.LANCZOS
+
+# --- CONFIG ---
+# One engine per concurrent worker is enough; each holds its own ONNX session
+OCR_POOL_SIZE = 4
+# eCourts captchas are 6 lowercase letters/digits
+CAPTCHA_LENGTH = 6
+CAPTCHA_CHARSET = string.ascii_lowercase + string.digits
+# A valid read of the raw image is submitted as is (one inference). Only when
+# it isn't are the preprocessed variants voted on, and below this vote a
+# fresh captcha is cheaper than a submit that will fail. Not tuned on a
+# recorded corpus yet (see benchmarks/captcha_corpus)
+MIN_CONFIDENCE = 0.35
+TOP_K = 3
+# When set, every captcha that passed the site check is saved as <code>.png
+RECORD_DIR = os.environ.get("CAPTCHA_RECORD_DIR", "")
+
+# --- PROCESS-LEVEL ENGINE POOL ---
+# Modules are imported once per process, so this survives Streamlit reruns
+# and is shared by every worker thread.
+_pool = queue.LifoQueue()
+_created = 0
+_lock = threading.Lock()
+
+def new_engine():
+    # Deferred: importing ddddocr pulls in onnxruntime
+    import ddddocr
+    return ddddocr.DdddOcr(show_ad=False)
+
+@contextmanager
+def ocr_engine():
+    """
+    Borrow a loaded ddddocr engine. Engines are created lazily (up to
+    OCR_POOL_SIZE) and handed back for reuse instead of reloading the model.
+    """
+    global _created
+    try:
+        engine = _pool.get_nowait()
+    except queue.Empty:
+        with _lock:
+            grow = _created < OCR_POOL_SIZE
+            if grow: _created += 1
+        if grow:
+            try: engine = new_engine()
+            except:
+                with _lock: _created -= 1
+                raise
+        else:
+            engine = _pool.get()
+    try:
+        yield engine
+    finally:
+        _pool.put(engine)
+
+def classify(image_bytes):
+    with ocr_engine() as ocr:
+        return ocr.classification(image_bytes)
+
+# --- PREPROCESSING VARIANTS ---
+def _gray(img):
+    return PIL.ImageOps.autocontrast(img.convert("L"))
+
+def _binary(img):
+    return _gray(img).point(lambda p: 255 if p > 140 else 0)
+
+def _denoise(img):
+    # Median filter removes the thin strike-through lines
+    return _gray(img).filter(PIL.ImageFilter.MedianFilter(3))
+
+VARIANTS = {
+    "raw": None,
+    "gray": _gray,
+    "binary": _binary,
+    "denoise": _denoise,
+}
+
+def image_variants(image_bytes, raw=True):
+    img = PIL.Image.open(io.BytesIO(image_bytes))
+    img.load()
+    out = []
+    for name, fn in VARIANTS.items():
+        if fn is None:
+            if raw: out.append((name, image_bytes))
+            continue
+        buf = io.BytesIO()
+        fn(img).save(buf, format="PNG")
+        out.append((name, buf.getvalue()))
+    return out
+
+# --- DECODING ---
+_allowed_cache = {}
+
+def _allowed_columns(charsets):
+    """Map each allowed character to the model columns that can produce it (case-folded)."""
+    key = id(charsets)
+    if key not in _allowed_cache:
+        cols = {}
+        for idx, ch in enumerate(charsets):
+            folded = ch.lower()
+            if folded in CAPTCHA_CHARSET and len(folded) == 1:
+                cols.setdefault(folded, []).append(idx)
+        _allowed_cache[key] = (charsets, list(cols.items()))
+    return _allowed_cache[key][1]
+
+def _decode(result):
+    """
+    Greedy CTC decode of a ddddocr probability matrix restricted to
+    CAPTCHA_CHARSET. Returns [(text, confidence)], best first, including
+    the runner-up at the least certain character when it scores above 0.
+    """
+    charsets, steps = result["charsets"], result["probability"]
+    allowed = _allowed_columns(charsets)
+    text, margins, log_conf = [], [], 0.0
+    prev = None
+    for row in steps:
+        blank = row[0]
+        scored = sorted(((sum(row[i] for i in idxs), ch) for ch, idxs in allowed), reverse=True)
+        best_p, best_ch = scored[0]
+        second_p, second_ch = scored[1]
+        total = blank + sum(p for p, _ in scored) or 1.0
+        if blank >= best_p:
+            log_conf += math.log(max(blank / total, 1e-9))
+            prev = None
+            continue
+        log_conf += math.log(max(best_p / total, 1e-9))
+        if best_ch != prev:
+            text.append(best_ch)
+            margins.append((best_p - second_p, len(text) - 1, second_ch, second_p / best_p))
+        prev = best_ch
+    conf = math.exp(log_conf / max(len(steps), 1))
+    out = [("".join(text), conf)]
+    if margins and min(margins)[3] > 0:
+        _, pos, alt, ratio = min(margins)
+        alt_text = text[:pos] + [alt] + text[pos + 1:]
+        out.append(("".join(alt_text), conf * ratio))
+    return out
+
+def _read(engine, image_bytes):
+    try:
+        return _decode(engine.classification(image_bytes, probability=True))
+    except TypeError:
+        # Older ddddocr without probability output: plain text, flat score
+        text = "".join(ch for ch in engine.classification(image_bytes).lower() if ch in CAPTCHA_CHARSET)
+        return [(text, 0.5)]
+
+def _valid(text):
+    return len(text) == CAPTCHA_LENGTH and all(ch in CAPTCHA_CHARSET for ch in text)
+
+def _vote(engine, variants, top_k):
+    scores = {}
+    for _, img in variants:
+        for text, conf in _read(engine, img):
+            if conf > 0 and _valid(text):
+                scores[text] = scores.get(text, 0.0) + conf
+    ranked = sorted(scores.items(), key=lambda kv: kv[1], reverse=True)
+    return [(text, score / len(variants)) for text, score in ranked[:top_k]]
+
+def vote(image_bytes, top_k=TOP_K):
+    """
+    Read the raw image; only when that read isn't a valid code are the
+    preprocessed variants scored, on the same engine. Returns the raw
+    image's read ("" when invalid) and up to `top_k` `(text, confidence)`
+    variant candidates, best first (empty when the raw read was valid);
+    confidence is the soft vote of the variants (0..1).
+    """
+    with ocr_engine() as engine:
+        text = _read(engine, image_bytes)[0][0]
+        if _valid(text): return text, []
+        return "", _vote(engine, image_variants(image_bytes, raw=False), top_k)
+
+def rank_candidates(image_bytes, top_k=TOP_K):
+    """Candidates of every variant, raw included, best first: for the benchmark's top-k."""
+    with ocr_engine() as engine:
+        return _vote(engine, image_variants(image_bytes), top_k)
+
+def pick(raw, ranked):
+    """The code to submit: a valid raw read, else the top candidate when its vote clears MIN_CONFIDENCE, else ""."""
+    if raw: return raw
+    if ranked and ranked[0][1] >= MIN_CONFIDENCE:
+        return ranked[0][0]
+    return ""
+
+def solve(image_bytes):
+    """Best candidate, or "" when nothing is worth a submit."""
+    return pick(*vote(image_bytes))
+
+def record(image_bytes, label):
+    """Save a site-verified captcha to the corpus (no-op unless CAPTCHA_RECORD_DIR is set)."""
+    if not RECORD_DIR or not label: return
+    os.makedirs(RECORD_DIR, exist_ok=True)
+    path = os.path.join(RECORD_DIR, f"{label}.png")
+    if not os.path.exists(path):
+        with open(path, "wb") as f:
+            f.write(image_bytes)
@@ -0,0 +1,119 @@
+import csv
+import io
+from datetime import date
+from typing import NamedTuple
+from case_type_map import resolve_many, site_value
+
+# Header variants accepted for each field (compared without dots/case/spaces)
+COLUMNS = {
+    "type": ("casetype", "type"),
+    "no": ("caseno", "casenumber", "number", "no"),
+    "year": ("year", "caseyear"),
+}
+MIN_YEAR = 1900
+
+
+class ImportReport(NamedTuple):
+    cases: list        # ready for run_batch_process
+    errors: list       # (row number, message), row numbers as in the sheet
+    duplicates: int
+    total: int
+
+
+def header_key(name):
+    """Header cell as compared against COLUMNS: no dots, case or spaces."""
+    return "".join(str(name or "").replace(".", "").lower().split())
+
+def clean_cell(val):
+    """Excel floats like 1999.0 -> '1999'; strings trimmed."""
+    if val is None: return ""
+    if isinstance(val, float) and val.is_integer(): return str(int(val))
+    val = str(val).strip()
+    # The same float as text, e.g. from a CSV exported by Excel
+    if val.endswith(".0") and val[:-2].isdigit(): return val[:-2]
+    return val
+
+def read_rows(source, filename=""):
+    """
+    (headers, rows) from a CSV or XLSX path or file object, in one pass.
+    XLSX uses openpyxl's read-only streaming mode.
+    """
+    name = (filename or (source if isinstance(source, str) else getattr(source, "name", ""))).lower()
+    if name.endswith((".xlsx", ".xlsm")):
+        from openpyxl import load_workbook
+        wb = load_workbook(source, read_only=True, data_only=True)
+        try:
+            rows = list(wb.active.iter_rows(values_only=True))
+        finally:
+            wb.close()
+    else:
+        if isinstance(source, str):
+            with open(source, newline="", encoding="utf-8-sig") as f:
+                rows = list(csv.reader(f))
+        else:
+            text = source.read()
+            if isinstance(text, bytes): text = text.decode("utf-8-sig")
+            rows = list(csv.reader(io.StringIO(text)))
+    if not rows: return [], []
+    return list(rows[0]), rows[1:]
+
+def normalize(headers, rows):
+    """
+    Column-wise normalization of a case list: each distinct case type is
+    resolved once, numbers/years are cleaned per column, invalid rows are
+    collected (not raised) and duplicate cases dropped. Cases carry the
+    site's #case_type option value where it is known already; job_runner
+    reads the rest from the live dropdown.
+    """
+    keys = [header_key(h) for h in headers]
+    idx = {}
+    for field, names in COLUMNS.items():
+        idx[field] = next((keys.index(n) for n in names if n in keys), None)
+    missing = [field for field, i in idx.items() if i is None]
+    if missing:
+        raise KeyError(f"Missing required columns: {missing}. Headers present: {headers}")
+
+    # Transpose once, then work on whole columns
+    width = max(idx.values()) + 1
+    padded = [tuple(row) + (None,) * (width - len(row)) for row in rows]
+    types = [clean_cell(r[idx["type"]]) for r in padded]
+    nos = [clean_cell(r[idx["no"]]) for r in padded]
+    years = [clean_cell(r[idx["year"]]) for r in padded]
+
+    distinct = list(set(types))
+    resolved = {}
+    for raw, record in zip(distinct, resolve_many(distinct)):
+        if record is None:
+            resolved[raw] = (None, None, f"Unknown case type: {raw}")
+        else:
+            resolved[raw] = (record.label, site_value(record.label), None)
+
+    max_year = date.today().year
+    cases, errors, seen = [], [], set()
+    duplicates = 0
+    for i, (raw, no, year) in enumerate(zip(types, nos, years)):
+        row_no = i + 2  # header is row 1
+        if not (raw or no or year): continue  # blank line
+        label, value, err = resolved[raw]
+        if err:
+            errors.append((row_no, err))
+            continue
+        if not no.isdigit():
+            errors.append((row_no, f"Invalid case number '{no}'"))
+            continue
+        if not (year.isdigit() and MIN_YEAR <= int(year) <= max_year):
+            errors.append((row_no, f"Invalid year '{year}'"))
+            continue
+        no = str(int(no))
+        key = (label, no, year)
+        if key in seen:
+            duplicates += 1
+            continue
+        seen.add(key)
+        cases.append({"name": label, "value": value, "no": no, "year": year})
+    return ImportReport(cases, errors, duplicates, len(rows))
+
+def import_cases(source, filename=""):
+    """Load and validate a CSV/XLSX case list; nothing touches the network."""
+    headers, rows = read_rows(source, filename)
+    return normalize(headers, rows)
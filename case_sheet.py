@@ -0,0 +1,167 @@
+import os
+import time
+from case_import import clean_cell, header_key
+from case_type_map import lookup_case_type, site_value
+
+# --- CONFIG ---
+SHEET_NAME = "Cases"
+# Checkpoints: buffered updates are written back (and the workbook saved)
+# every this many updated rows or seconds, whichever comes first
+FLUSH_ROWS = 25
+FLUSH_SECS = 30.0
+
+
+class OpenpyxlBackend:
+    """An .xlsx file on disk; runs anywhere, no Excel needed."""
+
+    def __init__(self, path, sheet=SHEET_NAME):
+        from openpyxl import load_workbook
+        self.path = path
+        self.wb = load_workbook(path)
+        self.ws = self.wb[sheet] if sheet in self.wb.sheetnames else self.wb.active
+
+    def read(self):
+        return [list(row) for row in self.ws.iter_rows(values_only=True)]
+
+    def write(self, row, col, values):
+        """Write a 2-D block with its top-left cell at (row, col), 1-based."""
+        for r, line in enumerate(values, start=row):
+            for c, value in enumerate(line, start=col):
+                self.ws.cell(r, c, value)
+
+    def save(self):
+        tmp = self.path + ".tmp"
+        self.wb.save(tmp)
+        os.replace(tmp, self.path)
+
+
+class XlwingsBackend:
+    """A sheet of a live Excel workbook: one COM call per read, per block write and per save."""
+
+    def __init__(self, sheet):
+        self.sheet = sheet
+
+    def read(self):
+        used = self.sheet.range("A1", self.sheet.used_range.last_cell)
+        return [list(row) for row in used.options(ndim=2).value]
+
+    def write(self, row, col, values):
+        self.sheet.range((row, col)).value = values
+
+    def save(self):
+        self.sheet.book.save()
+
+
+class CaseSheet:
+    """
+    In-memory copy of a case sheet, read in a single call. Updates are
+    buffered and written back as one range write per column and run of
+    consecutive rows at each checkpoint, followed by a save, so a crash
+    loses at most one checkpoint's worth of rows.
+    """
+
+    def __init__(self, backend, flush_rows=FLUSH_ROWS, flush_secs=FLUSH_SECS):
+        self.backend = backend
+        self.flush_rows = flush_rows
+        self.flush_secs = flush_secs
+        values = backend.read()
+        self.headers = [str(h or "").strip() for h in values[0]] if values else []
+        self.rows = [list(row) for row in values[1:]]
+        self.columns = {header_key(h): i for i, h in enumerate(self.headers)}
+        self.pending = {}  # data row index -> {column index: value}
+        self.flushed = time.monotonic()
+
+    def column(self, name, create=False):
+        """Index of a column (header compared without dots/case/spaces); optionally appended."""
+        key = header_key(name)
+        if key not in self.columns:
+            if not create:
+                raise KeyError(f"Missing required column: {name}. Headers present: {self.headers}")
+            self.headers.append(name)
+            self.columns[key] = len(self.headers) - 1
+            self.backend.write(1, len(self.headers), [[name]])
+        return self.columns[key]
+
+    def value(self, row, name):
+        col = self.column(name)
+        line = self.rows[row]
+        return line[col] if col < len(line) else None
+
+    def update(self, row, values):
+        """Set {column name: value} on a data row (0-based); written at the next checkpoint."""
+        line = self.rows[row]
+        cells = self.pending.setdefault(row, {})
+        for name, value in values.items():
+            col = self.column(name)
+            line.extend([None] * (col + 1 - len(line)))
+            line[col] = cells[col] = value
+        if len(self.pending) >= self.flush_rows or time.monotonic() - self.flushed >= self.flush_secs:
+            self.flush()
+
+    def flush(self):
+        by_col = {}
+        for row, cells in self.pending.items():
+            for col, value in cells.items():
+                by_col.setdefault(col, {})[row] = value
+        for col, cells in by_col.items():
+            rows = sorted(cells)
+            start = 0
+            for i in range(1, len(rows) + 1):
+                if i < len(rows) and rows[i] == rows[i - 1] + 1: continue
+                run = rows[start:i]
+                # +2: 1-based, below the header row
+                self.backend.write(run[0] + 2, col + 1, [[cells[r]] for r in run])
+                start = i
+        if self.pending:
+            self.backend.save()
+        self.pending.clear()
+        self.flushed = time.monotonic()
+
+
+def fill_cnrs(sheet, workers=None, log=print):
+    """
+    The Excel CNR workflow: every row whose Status is "pending" gets its CNR
+    looked up (cnr_resolver.resolve_cnrs) and CNR / Status / Notes written
+    back through checkpoints.
+    """
+    from cnr_resolver import CNR_WORKERS, resolve_cnrs
+    for name in ("Case Type", "Case No", "Year", "CNR", "Status"):
+        sheet.column(name)
+    sheet.column("Notes", create=True)
+
+    todo, cases = [], []
+    for row in range(len(sheet.rows)):
+        if str(sheet.value(row, "Status") or "").strip().lower() != "pending": continue
+        raw = clean_cell(sheet.value(row, "Case Type"))
+        record = lookup_case_type(raw)
+        if record is None:
+            sheet.update(row, {"CNR": "Error", "Status": "Error", "Notes": f"Unknown case type: {raw}"})
+            continue
+        todo.append(row)
+        cases.append({"name": record.label, "value": site_value(record.label),
+                      "no": clean_cell(sheet.value(row, "Case No")), "year": clean_cell(sheet.value(row, "Year"))})
+    log(f"{len(cases)} pending rows")
+
+    for row, (case, cnr, lines) in zip(todo, resolve_cnrs(cases, workers or CNR_WORKERS)):
+        for at, message in lines:
+            log(f"[{at:%H:%M:%S}] row {row + 2}: {message}")
+        if cnr:
+            sheet.update(row, {"CNR": cnr, "Status": "Fetched", "Notes": ""})
+        else:
+            sheet.update(row, {"CNR": "Not Found" if cnr is None else "Error", "Status": "Error",
+                               "Notes": "No CNR found" if cnr is None else "Lookup failed"})
+    sheet.flush()
+
+def run_from_excel():
+    """Entry point for an xlwings RunPython macro in the open workbook."""
+    import xlwings as xw
+    fill_cnrs(CaseSheet(XlwingsBackend(xw.Book.caller().sheets[SHEET_NAME])))
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Fill the CNR column of pending rows in an .xlsx case sheet.")
+    parser.add_argument("path")
+    parser.add_argument("--sheet", default=SHEET_NAME)
+    parser.add_argument("--workers", type=int)
+    args = parser.parse_args()
+    fill_cnrs(CaseSheet(OpenpyxlBackend(args.path, args.sheet)), args.workers)
@@ -0,0 +1,75 @@
+import os
+import sqlite3
+import threading
+import time
+
+# --- CONFIG ---
+STATE_DB = os.environ.get("HC_STATE_DB", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "case_state.sqlite"))
+# How often a case is re-checked in incremental mode, unless the case sets "refresh_hours"
+DEFAULT_REFRESH_HOURS = 24
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cases (
+    case_type TEXT NOT NULL,
+    case_no TEXT NOT NULL,
+    case_year TEXT NOT NULL,
+    last_order_date TEXT,
+    last_checked REAL NOT NULL,
+    fingerprint TEXT,
+    PRIMARY KEY (case_type, case_no, case_year)
+);
+"""
+
+
+class CaseState:
+    """Per-case monitoring state: last order date seen, last check, order-table fingerprint."""
+
+    def __init__(self, path=STATE_DB):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(SCHEMA)
+
+    @staticmethod
+    def _key(case):
+        return (case['value'], str(case['no']), str(case['year']))
+
+    def get(self, case):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT last_order_date, last_checked, fingerprint FROM cases "
+                "WHERE case_type=? AND case_no=? AND case_year=?", self._key(case)).fetchone()
+        return dict(zip(("last_order_date", "last_checked", "fingerprint"), row)) if row else None
+
+    def due(self, cases, now=None):
+        """The cases whose refresh interval has elapsed (or that were never checked)."""
+        now = now or time.time()
+        out = []
+        for case in cases:
+            state = self.get(case)
+            interval = float(case.get("refresh_hours", DEFAULT_REFRESH_HOURS)) * 3600
+            if state is None or now - state["last_checked"] >= interval:
+                out.append(case)
+        return out
+
+    def observe(self, case, order_date, fingerprint):
+        """Record a successful check; returns True when the order table changed (or is new)."""
+        key = self._key(case)
+        with self._lock:
+            row = self._db.execute(
+                "SELECT fingerprint FROM cases WHERE case_type=? AND case_no=? AND case_year=?", key).fetchone()
+            self._db.execute("INSERT OR REPLACE INTO cases VALUES (?, ?, ?, ?, ?, ?)",
+                             key + (order_date, time.time(), fingerprint))
+            self._db.commit()
+        return row is None or row[0] != fingerprint
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+def shared():
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = CaseState()
+        return _shared
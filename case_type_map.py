@@ -132,6 +132,13 @@
 #         else:
 #             raise ValueError(f"Unknown civil case type: {short}")
 # case_type_map.py
+import json
+import os
+import re
+import threading
+from functools import lru_cache
+from types import MappingProxyType
+from typing import NamedTuple, Optional
 
 # -------------------------
 # Civil case types
@@ -246,6 +253,159 @@ CRIMINAL_CASE_MAP = {
     "SMP": "Suo-Motu Criminal PIL",
 }
 
+# -------------------------
+# hcservices #case_type option values
+# -------------------------
+# The eCourts form selects case types by numeric value, not by text. Only
+# these are known up front; the rest are read from the live dropdown
+# (learn_site_values) and kept in SITE_VALUES_FILE.
+SITE_OPTION_VALUES = {
+    "Civil Writ Petition": "1",
+    "Second Appeal": "4",
+}
+SITE_VALUES_FILE = os.environ.get("HC_SITE_VALUES", os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), ".cache", "site_case_types.json"))
+
+# -------------------------
+# Precompiled lookup index
+# -------------------------
+class CaseType(NamedTuple):
+    side: str             # "Civil" or "Criminal" (the CNR site's side dropdown)
+    code: str             # normalized short form, e.g. "SA", "CREF"
+    label: str            # exact dropdown text
+
+_NOISE = re.compile(r"[\s.\-]+")
+
+def _key(text):
+    """'Cr. W.P.' -> 'CRWP', 'Second Appeal' -> 'SECONDAPPEAL'."""
+    return _NOISE.sub("", text.upper())
+
+def _label_key(text):
+    """Exact dropdown text, ignoring case and spacing: hyphens and dots still count."""
+    return " ".join(text.upper().split())
+
+def _records():
+    for side, case_map in (("Civil", CIVIL_CASE_MAP), ("Criminal", CRIMINAL_CASE_MAP)):
+        for code, label in case_map.items():
+            yield CaseType(side, code, label)
+
+def _build_label_index():
+    # Labels that only differ by punctuation ("Suo Motu Writ Petition" is
+    # civil, "Suo-Motu Writ Petition" criminal) collide once _key strips it,
+    # so exact labels are looked up first. A label both sides share
+    # ("INTERIM APPLICATION") stays civil; the criminal one needs "Cr".
+    index, shared = {}, set()
+    for record in _records():
+        for alias in (record.label, f"{record.code} - {record.label}"):
+            if index.setdefault(_label_key(alias), record) != record: shared.add(_label_key(alias))
+    return MappingProxyType(index), frozenset(shared)
+
+def _build_index():
+    index, shared = {}, set()
+
+    def add(alias, record):
+        # First writer wins: civil is added first, so shared codes stay civil
+        if index.setdefault(_key(alias), record) != record: shared.add(_key(alias))
+
+    for record in _records():
+        for alias in (record.code, record.label, f"{record.code} - {record.label}"):
+            if record.side == "Criminal":
+                add("Cr" + alias, record)
+                add("Criminal " + alias, record)
+            add(alias, record)
+    # Criminal writs are typed many ways: Cr.WP, CR.WP, Cr. CWP, and the
+    # CNR site's dropdown reads "Cr. Writ Petition"
+    writ = index[_key("CRWP")]
+    for alias in ("Cr WP", "Cr CWP", "Cr CRWP", "Cr Writ Petition"):
+        add(alias, writ)
+    return MappingProxyType(index), frozenset(shared)
+
+# Every normalized alias -> CaseType, built once at import (plus the keys
+# more than one case type claims)
+CASE_TYPE_INDEX, _SHARED_KEYS = _build_index()
+# Exact labels ("Label", "CODE - Label") -> CaseType, tried before the aliases
+LABEL_INDEX, _SHARED_LABELS = _build_label_index()
+
+@lru_cache(maxsize=4096)
+def lookup_case_type(case_type_raw: str) -> Optional[CaseType]:
+    """CaseType for a messy input (e.g. 'Cr. WP', 'c.ref', 'SA - Second Appeal'), or None."""
+    raw = (case_type_raw or "").strip()
+    record = LABEL_INDEX.get(_label_key(raw)) or CASE_TYPE_INDEX.get(_key(raw))
+    if record is None and " - " in raw:
+        record = CASE_TYPE_INDEX.get(_key(raw.split(" - ")[0]))
+    if record is None and not raw.lower().startswith("cr"):
+        # Friendly fallbacks for common verbose inputs
+        key = _key(raw)
+        if key.startswith("SA"):
+            record = CASE_TYPE_INDEX["SA"]
+        elif key.startswith("WP"):
+            record = CASE_TYPE_INDEX["WP"]
+    return record
+
+def resolve_many(case_types_raw):
+    """Bulk lookup: one CaseType (or None when unknown) per input, in order."""
+    return [lookup_case_type(raw) for raw in case_types_raw]
+
+# -------------------------
+# Site option values
+# -------------------------
+_site_values = None
+_site_lock = threading.Lock()
+
+def _load_site_values():
+    global _site_values
+    if _site_values is None:
+        _site_values = dict(SITE_OPTION_VALUES)
+        try:
+            with open(SITE_VALUES_FILE, encoding="utf-8") as f:
+                _site_values.update(json.load(f))
+        except (OSError, ValueError):
+            pass  # nothing learned yet
+    return _site_values
+
+def site_values():
+    """Label -> hcservices #case_type option value, for every case type known so far."""
+    with _site_lock:
+        return dict(_load_site_values())
+
+def site_value(label):
+    """The #case_type option value for a case type label, or None until the site's dropdown was read."""
+    with _site_lock:
+        return _load_site_values().get(label)
+
+def _exact_case_type(text):
+    """CaseType an option text names exactly (label, "CODE - Label", code or alias); None if none or several."""
+    key = _label_key(text)
+    if key in LABEL_INDEX:
+        return None if key in _SHARED_LABELS else LABEL_INDEX[key]
+    key = _key(text)
+    return None if key in _SHARED_KEYS else CASE_TYPE_INDEX.get(key)
+
+def learn_site_values(options):
+    """
+    Record the live #case_type dropdown, as (value, text) pairs. Only option
+    texts that name one case type exactly count (no lookup_case_type
+    fallbacks), and a case type offered under two values is skipped.
+    Returns the number of case types found.
+    """
+    learned, conflicting = {}, set()
+    for value, text in options:
+        record = _exact_case_type(text)
+        if record and value and learned.setdefault(record.label, value) != value:
+            conflicting.add(record.label)
+    for label in conflicting:
+        del learned[label]
+    with _site_lock:
+        values = _load_site_values()
+        values.update(learned)
+        os.makedirs(os.path.dirname(SITE_VALUES_FILE), exist_ok=True)
+        tmp = SITE_VALUES_FILE + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({label: value for label, value in values.items() if label not in SITE_OPTION_VALUES}, f,
+                      indent=1, sort_keys=True)
+        os.replace(tmp, SITE_VALUES_FILE)
+    return len(learned)
+
 # -------------------------
 # Resolver function
 # -------------------------
@@ -254,32 +414,9 @@ def resolve_case_type(case_type_raw: str) -> str:
     Convert Excel input (e.g., 'WP', 'Cr.WP', 'SA - Second Appeal', 'Cr. WP')
     into the exact dropdown text.
     """
-    raw = (case_type_raw or "").strip()
-
-    # Extract side hint and clean
-    is_criminal = raw.lower().startswith("cr")
-    # Remove common prefixes and punctuation, normalize
-    cleaned = raw.replace("Cr.", "").replace("Cr", "").strip()
-    # Remove descriptive suffix after hyphen (e.g., "SA - Second Appeal")
-    if " - " in cleaned:
-        cleaned = cleaned.split(" - ")[0].strip()
-    # Normalize dots in keys (e.g., C.REF -> CREF)
-    cleaned_key = cleaned.replace(".", "").upper()
-
-    # Resolve by side
-    if is_criminal:
-        # Special cases for criminal writs typed as "Cr.WP" or "CR.WP"
-        if cleaned_key in ("CRWP", "CWP", "WP"):
-            return "Criminal Writ Petition"
-        if cleaned_key in CRIMINAL_CASE_MAP:
-            return CRIMINAL_CASE_MAP[cleaned_key]
-        raise ValueError(f"Unknown criminal case type: {cleaned}")
-    else:
-        if cleaned_key in CIVIL_CASE_MAP:
-            return CIVIL_CASE_MAP[cleaned_key]
-        # Friendly fallbacks for common verbose inputs
-        if cleaned_key.startswith("SA"):
-            return "Second Appeal"
-        if cleaned_key.startswith("WP"):
-            return "Civil Writ Petition"
-        raise ValueError(f"Unknown civil case type: {cleaned}")
+    record = lookup_case_type(case_type_raw)
+    if record is None:
+        raw = (case_type_raw or "").strip()
+        side = "criminal" if raw.lower().startswith("cr") else "civil"
+        raise ValueError(f"Unknown {side} case type: {raw}")
+    return record.label
@@ -0,0 +1,173 @@
+import os
+import re
+import time
+from contextlib import contextmanager
+import retry_policy
+from case_type_map import lookup_case_type
+from scraper import BROWSER_ARGS, USER_AGENT, ResourcePolicy, StepTimer
+from worker_pool import HostGate, run_pool
+
+# --- CONFIG ---
+CNR_FORM_URL = os.environ.get("HC_CNR_URL", "https://bombayhighcourt.nic.in/case_query.php")
+# Parallel browser sessions, each resubmitting the form case after case
+CNR_WORKERS = 4
+CNR_RETRIES = 3
+# Politeness towards the case-query host (separate from hcservices)
+CNR_MAX_PER_HOST = 4
+CNR_INTERVAL = 0.5
+STEP_TIMEOUT = 15000
+# Seconds a filled case type list may still be the previous side's
+OPTION_WAIT = 2.0
+
+# case_query.php's fields carry no ids; these are positional, as on the live
+# form. The result page re-renders the same form with the CNR in row 3.
+FORM = "xpath=/html/body/div[3]/div/div[2]/form/table/tbody"
+SIDE = "select[name='m_sideflg']"
+CASE_TYPE = f"{FORM}/tr[2]/td/div[6]/div[2]/select"
+CASE_NO = f"{FORM}/tr[2]/td/div[8]/div[2]/input"
+CASE_YEAR = f"{FORM}/tr[2]/td/div[9]/div[2]/select"
+CAPTCHA_IMG = "img[src*='captcha']"
+CAPTCHA_INPUT = f"{FORM}/tr[2]/td/div[13]/div[2]/input[2]"
+SUBMIT = f"{FORM}/tr[2]/td/div[14]/input"
+CNR_CELL = f"{FORM}/tr[3]/td[2]"
+# The captcha's answer travels in its own image URL
+CAPTCHA_RAND = re.compile(r"[?&]rand=([A-Za-z0-9]+)")
+
+SELECTED_TEXT_JS = "s => s.selectedIndex < 0 ? '' : s.options[s.selectedIndex].text.trim()"
+OPTIONS_JS = "s => Array.from(s.options, o => [o.value, o.text.trim()])"
+
+
+class NoTypeOption(ValueError):
+    """The side's case type list has no option for the case type: not worth a retry."""
+
+
+def _is_type_option(text, record):
+    # Options mostly read "CODE - old-style text" ("CP - Cont. Petition"), a
+    # few just a label ("Second Appeal", "Cr. Writ Petition"). The list only
+    # holds the selected side's types, so the code decides.
+    if text.startswith(record.code + " - "): return True
+    found = lookup_case_type(text)
+    return found is not None and found.code == record.code
+
+
+class CnrSession:
+    """
+    One page parked on case_query.php. Each case resubmits the form the
+    previous result page came back with; side and case type are only
+    touched when they differ from what is already selected.
+    """
+
+    def __init__(self, page):
+        self.page = page
+        self.ready = False
+
+    def open(self, timer):
+        with timer.step("goto"):
+            self.page.goto(CNR_FORM_URL, timeout=60000)
+            self.page.wait_for_selector(CAPTCHA_IMG, state="attached", timeout=STEP_TIMEOUT)
+        self.ready = True
+
+    def _select_side(self, record, timer):
+        with timer.step("side"):
+            if self.page.eval_on_selector(SIDE, SELECTED_TEXT_JS).lower() != record.side.lower():
+                self.page.select_option(SIDE, label=record.side)
+
+    def _select_type(self, record, timer):
+        page = self.page
+        with timer.step("case_type"):
+            if _is_type_option(page.eval_on_selector(CASE_TYPE, SELECTED_TEXT_JS), record): return
+            # After a side change the list is reloaded: wait for it to fill,
+            # then (briefly) for the new side's list to replace the old one
+            page.wait_for_selector(f"{CASE_TYPE}[count(option) > 1]", state="attached", timeout=STEP_TIMEOUT)
+            deadline = time.monotonic() + OPTION_WAIT
+            while True:
+                value = next((v for v, text in page.eval_on_selector(CASE_TYPE, OPTIONS_JS)
+                              if _is_type_option(text, record)), None)
+                if value is not None: break
+                if time.monotonic() > deadline:
+                    raise NoTypeOption(f"No '{record.label}' option for side {record.side}")
+                page.wait_for_timeout(100)
+            page.select_option(CASE_TYPE, value=value)
+
+    def submit(self, record, no, year, timer):
+        """Fill and submit the form; returns the CNR, or "" when the site shows none."""
+        page = self.page
+        if not self.ready: self.open(timer)
+        self._select_side(record, timer)
+        self._select_type(record, timer)
+        with timer.step("case_form"):
+            page.fill(CASE_NO, no)
+            page.select_option(CASE_YEAR, label=year)
+            match = CAPTCHA_RAND.search(page.get_attribute(CAPTCHA_IMG, "src") or "")
+            if not match: raise ValueError("captcha code missing from the image URL")
+            page.fill(CAPTCHA_INPUT, match.group(1))
+        with timer.step("submit"):
+            with page.expect_navigation(timeout=60000):
+                page.click(SUBMIT)
+        if "invalidinputerror" in page.url:
+            self.ready = False
+            raise ValueError("site rejected the session/input")
+        cell = page.locator(CNR_CELL)
+        return cell.first.inner_text().strip() if cell.count() else ""
+
+
+def lookup_cnr(session, case, log, throttle=None):
+    """
+    CNR for one case dict (as from case_import). Returns the CNR, None when
+    the site has no CNR for it, or False when the case type is unknown or
+    every retry failed.
+    """
+    record = lookup_case_type(case['name'])
+    if record is None:
+        log(f"❌ Unknown case type: {case['name']}")
+        return False
+    status = None
+    for attempt in range(1, CNR_RETRIES + 1):
+        if status and not retry_policy.before_retry(throttle, status, attempt - 1, log): break
+        timer = StepTimer()
+        try:
+            if throttle: throttle()
+            cnr = session.submit(record, case['no'], case['year'], timer)
+            if not cnr: log("⚠️ No CNR found.")
+            else: log(f"🔖 CNR {cnr}")
+            return cnr or None
+        except retry_policy.HostDown as e:
+            log(f"⛔ {e}")
+            timer.fail(retry_policy.DEFERRED)
+        except NoTypeOption as e:
+            # The site answered; only this case type is off its list
+            log(f"❌ {e}")
+            return False
+        except Exception as e:
+            session.ready = False
+            log(f"❌ Error: {e}")
+            timer.fail("error", str(e))
+        finally:
+            timer.finish(attempt, log)
+            retry_policy.report(throttle, timer.status)
+            status = timer.status
+    return False
+
+@contextmanager
+def cnr_worker(throttle=None, stats=None):
+    """One browser session on case_query.php, reused for every case the thread pulls."""
+    from playwright.sync_api import sync_playwright
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=True, args=BROWSER_ARGS)
+        try:
+            context = browser.new_context(user_agent=USER_AGENT)
+            ResourcePolicy().attach(context).stats = stats
+            session = CnrSession(context.new_page())
+            yield lambda case, log: lookup_cnr(session, case, log, throttle)
+        finally:
+            browser.close()
+
+def resolve_cnrs(cases, workers=CNR_WORKERS, gate=None, stats=None, tracer=None):
+    """
+    Batch CNR lookup over `workers` long-lived browser sessions. Yields
+    `(case, cnr, log_lines)` in input order, like run_pool; `cnr` as
+    returned by lookup_cnr.
+    """
+    gate = gate or HostGate(CNR_MAX_PER_HOST, CNR_INTERVAL)
+    return run_pool(cases, lambda: cnr_worker(gate.throttle(CNR_FORM_URL), stats),
+                    workers=workers, slot=gate.slot(CNR_FORM_URL), tracer=tracer)
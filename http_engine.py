@@ -0,0 +1,207 @@
+import html
+import json
+import random
+import re
+import time
+from contextlib import contextmanager
+import requests
+from requests.adapters import HTTPAdapter
+import captcha
+import retry_policy
+from scraper import (BASE_URL, MAX_RETRIES, URL, USER_AGENT, OrderLink, StepTimer, plan_order, record_download,
+                     save_order)
+
+# --- CONFIG ---
+# The AJAX endpoints main.php itself calls for the case-number search
+CAPTCHA_URL = BASE_URL + "securimage/securimage_show.php"
+SEARCH_URL = BASE_URL + "cases_qry/index_qry.php"
+HISTORY_URL = BASE_URL + "cases_qry/o_civil_case_history.php"
+
+# Bombay High Court, principal seat (same values the browser engine selects)
+STATE_CODE = "1"
+COURT_COMPLEX_CODE = "1"
+COURT_CODE = "1"
+
+TIMEOUT = (10, 60)  # connect, read
+OPTION_TAG = re.compile(r"<option[^>]*value=[\"']?([^\"'\s>]*)[^>]*>([^<]*)", re.I)
+POOL_SIZE = 4
+
+
+def new_session(stats=None):
+    """
+    Keep-alive session; main.php sets the PHP session cookie the AJAX calls
+    need. Traffic is counted into `stats` (a NetStats), if given.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({"User-Agent": USER_AGENT, "Referer": URL})
+    if stats:
+        session.hooks["response"].append(
+            lambda r, *args, **kwargs: stats.add(int(r.headers.get("content-length") or 0)))
+    return session
+
+def start_session(session):
+    session.cookies.clear()
+    session.get(URL, timeout=TIMEOUT).raise_for_status()
+
+def fetch_captcha(session):
+    response = session.get(CAPTCHA_URL, params={str(random.random()): ""}, timeout=TIMEOUT)
+    response.raise_for_status()
+    return response.content
+
+def parse_search(text):
+    """
+    The search answers with {"con": ["<json list of cases>"], ...}; older
+    responses carry the list directly. Returns the list of case records.
+    """
+    payload = json.loads(text)
+    records = []
+    for item in payload.get("con") or []:
+        if isinstance(item, str):
+            item = json.loads(item)
+        records.extend(item if isinstance(item, list) else [item])
+    return records
+
+def parse_options(text):
+    """
+    The case type list main.php loads into #case_type: "value~text#..."
+    pairs, or <option> tags. Returns (value, text) pairs.
+    """
+    if "<option" in text.lower():
+        pairs = OPTION_TAG.findall(text)
+    else:
+        pairs = [item.split("~", 1) for item in text.strip().split("#") if "~" in item]
+    return [(value.strip(), html.unescape(label).strip()) for value, label in pairs]
+
+def fetch_case_types(session):
+    """(value, text) of every #case_type option for the configured court."""
+    data = {"court_code": COURT_CODE, "state_code": STATE_CODE, "court_complex_code": COURT_COMPLEX_CODE}
+    response = session.post(SEARCH_URL, params={"action_code": "fillCaseType"}, data=data, timeout=TIMEOUT)
+    response.raise_for_status()
+    return parse_options(response.text)
+
+def search_case(session, case, code):
+    data = {
+        "court_code": COURT_CODE,
+        "state_code": STATE_CODE,
+        "court_complex_code": COURT_COMPLEX_CODE,
+        "caseStatusSearchType": "CScaseNumber",
+        "captcha": code,
+        "case_type": case['value'],
+        "case_no": case['no'],
+        "rgyear": case['year'],
+        "caseNoType": "new",
+        "displayOldCaseStatus": "N",
+    }
+    response = session.post(SEARCH_URL, params={"action_code": "showRecords"}, data=data, timeout=TIMEOUT)
+    response.raise_for_status()
+    return response.text
+
+def fetch_history(session, record):
+    data = {
+        "court_code": COURT_CODE,
+        "state_code": STATE_CODE,
+        "court_complex_code": COURT_COMPLEX_CODE,
+        "case_no": record.get("case_no", ""),
+        "cino": record.get("cino", ""),
+        "appFlag": "",
+    }
+    response = session.post(HISTORY_URL, data=data, timeout=TIMEOUT)
+    response.raise_for_status()
+    return response.text
+
+def lookup_history_http(session, case, log, throttle=None):
+    """
+    Navigation half of fetch_case_http: captcha, search and history calls.
+    Returns the history HTML, None when the case was not found, or False
+    when every retry failed (or the site's circuit breaker opened).
+    """
+    fresh = True
+    status = None
+    for attempt in range(1, MAX_RETRIES + 1):
+        if status and not retry_policy.before_retry(throttle, status, attempt - 1, log): break
+        timer = StepTimer()
+        try:
+            if throttle: throttle()
+            if fresh:
+                with timer.step("session"):
+                    start_session(session)
+                fresh = False
+
+            with timer.step("captcha"):
+                captcha_bytes = fetch_captcha(session)
+                code = captcha.solve(captcha_bytes)
+            if not code:
+                log("⚠️ Captcha blurry. Fetching a new one...")
+                timer.fail("blurry")
+                continue
+
+            with timer.step("submit"):
+                text = search_case(session, case, code)
+            if "Invalid Captcha" in text:
+                log("❌ Invalid Captcha. Retrying...")
+                timer.fail("invalid_captcha")
+                continue
+            captcha.record(captcha_bytes, code)
+
+            try: records = parse_search(text)
+            except ValueError:
+                # Not JSON: usually an expired session, start over
+                fresh = True
+                timer.fail("timeout", "session expired")
+                continue
+            if not records:
+                log("⚠️ Case not found.")
+                return None
+
+            with timer.step("history"):
+                return fetch_history(session, records[0])
+
+        except retry_policy.HostDown as e:
+            log(f"⛔ {e}")
+            timer.fail(retry_policy.DEFERRED)
+        except Exception as e:
+            log(f"❌ Error: {e}")
+            timer.fail("error", str(e))
+            fresh = True
+        finally:
+            timer.finish(attempt, log)
+            retry_policy.report(throttle, timer.status)
+            status = timer.status
+
+    return False
+
+def fetch_case_http(session, case, log, throttle=None):
+    """
+    Browser-free twin of scraper.fetch_case: same inputs, same return
+    values, but speaks the form's AJAX endpoints over a pooled session.
+    A wrong captcha only costs a new captcha image, not a page reload.
+    """
+    history = lookup_history_http(session, case, log, throttle)
+    if history is None or history is False: return history
+    link = plan_order(case, history, log)
+    if not isinstance(link, OrderLink): return link
+
+    if throttle: throttle()
+    start = time.perf_counter()
+    response = session.get(link.url, timeout=TIMEOUT)
+    record_download(log, time.perf_counter() - start, len(response.content))
+    return save_order(case, link, response.status_code, response.headers.get("content-type", ""), response.content, log)
+
+def lookup_case_http(session, case, log, throttle=None):
+    """Pipeline entry point, like scraper.lookup_case: (history HTML, session cookies)."""
+    history = lookup_history_http(session, case, log, throttle)
+    if history is None or history is False: return history
+    return history, session.cookies.get_dict()
+
+@contextmanager
+def http_worker(throttle=None, stats=None, lookup_only=False):
+    """HTTP counterpart of scraper.browser_worker: one session per worker thread."""
+    session = new_session(stats)
+    try:
+        fetch = lookup_case_http if lookup_only else fetch_case_http
+        yield lambda case, log: fetch(session, case, log, throttle)
+    finally:
+        session.close()
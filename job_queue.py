@@ -0,0 +1,183 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# --- CONFIG ---
+JOBS_DB = os.environ.get("HC_JOBS_DB", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "jobs.sqlite"))
+# A running job whose worker hasn't checked in for this long is taken over by the next worker
+STALE_SECS = 120
+# Log lines of jobs finished longer ago than this are dropped when a job is submitted
+LOG_KEEP_DAYS = 30
+
+# Case statuses: "pending" until checkpointed, then done (an order to view),
+# unchanged (incremental, order table as before), empty (no order found),
+# failed (every retry and the requeue round failed) or skipped (not due).
+# "cnr" jobs (job_runner.run_cnr_job): done (CNR found), empty or failed
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created REAL NOT NULL,
+    engine TEXT NOT NULL,
+    workers INTEGER NOT NULL,
+    incremental INTEGER NOT NULL,
+    orders TEXT NOT NULL DEFAULT 'latest',
+    status TEXT NOT NULL,
+    worker TEXT,
+    heartbeat REAL,
+    finished REAL,
+    trace TEXT
+);
+CREATE TABLE IF NOT EXISTS job_cases (
+    job_id INTEGER NOT NULL,
+    idx INTEGER NOT NULL,
+    case_json TEXT NOT NULL,
+    status TEXT NOT NULL,
+    result_json TEXT,
+    PRIMARY KEY (job_id, idx)
+);
+CREATE TABLE IF NOT EXISTS job_log (
+    job_id INTEGER NOT NULL,
+    at REAL NOT NULL,
+    message TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS job_log_job ON job_log (job_id);
+"""
+
+JOB_FIELDS = ("id", "created", "engine", "workers", "incremental", "orders", "status", "worker", "heartbeat",
+              "finished")
+
+
+class JobQueue:
+    """
+    Batches submitted from the UI or the CLI, drained by job_runner in a
+    separate process. Each case is checkpointed as it finishes, so a job
+    picked up again after a crash only runs its pending cases.
+    """
+
+    def __init__(self, path=JOBS_DB):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        # The UI reads while a worker process writes
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+        if "orders" not in [row[1] for row in self._db.execute("PRAGMA table_info(jobs)")]:
+            self._db.execute("ALTER TABLE jobs ADD COLUMN orders TEXT NOT NULL DEFAULT 'latest'")
+
+    def submit(self, cases, engine="http", workers=1, incremental=False, orders="latest"):
+        with self._lock, self._db:
+            job_id = self._db.execute(
+                "INSERT INTO jobs (created, engine, workers, incremental, orders, status) "
+                "VALUES (?, ?, ?, ?, ?, 'queued')",
+                (time.time(), engine, workers, int(incremental), orders)).lastrowid
+            self._db.executemany("INSERT INTO job_cases VALUES (?, ?, ?, 'pending', NULL)",
+                                 [(job_id, i, json.dumps(case)) for i, case in enumerate(cases)])
+            self._db.execute("DELETE FROM job_log WHERE job_id IN (SELECT id FROM jobs WHERE finished < ?)",
+                             (time.time() - LOG_KEEP_DAYS * 86400,))
+        return job_id
+
+    def claim(self, worker):
+        """The oldest queued (or abandoned running) job, now owned by `worker`; None when idle."""
+        with self._lock, self._db:
+            now = time.time()
+            row = self._db.execute(
+                "SELECT id FROM jobs WHERE status='queued' OR (status='running' AND heartbeat < ?) "
+                "ORDER BY id LIMIT 1", (now - STALE_SECS,)).fetchone()
+            if row is None: return None
+            self._db.execute("UPDATE jobs SET status='running', worker=?, heartbeat=? WHERE id=?",
+                             (worker, now, row[0]))
+        return self.job(row[0])
+
+    def queued(self):
+        """Number of jobs waiting for a worker."""
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM jobs WHERE status='queued'").fetchone()[0]
+
+    def heartbeat(self, job_id):
+        with self._lock, self._db:
+            self._db.execute("UPDATE jobs SET heartbeat=? WHERE id=?", (time.time(), job_id))
+
+    def pending(self, job_id):
+        """[(idx, case)] not checkpointed yet, in input order."""
+        with self._lock:
+            rows = self._db.execute("SELECT idx, case_json FROM job_cases WHERE job_id=? AND status='pending' "
+                                    "ORDER BY idx", (job_id,)).fetchall()
+        return [(idx, json.loads(case)) for idx, case in rows]
+
+    def log(self, job_id, lines):
+        """Append (datetime, message) lines to the job's log."""
+        with self._lock, self._db:
+            self._log(job_id, lines)
+
+    def _log(self, job_id, lines):
+        self._db.executemany("INSERT INTO job_log VALUES (?, ?, ?)",
+                             [(job_id, at.timestamp(), message) for at, message in lines])
+
+    def checkpoint(self, job_id, idx, status, result=None, lines=()):
+        """A case is finished: its status, result and log lines land in one transaction."""
+        with self._lock, self._db:
+            self._db.execute("UPDATE job_cases SET status=?, result_json=? WHERE job_id=? AND idx=?",
+                             (status, json.dumps(result) if result else None, job_id, idx))
+            self._log(job_id, lines)
+            self._db.execute("UPDATE jobs SET heartbeat=? WHERE id=?", (time.time(), job_id))
+
+    def finish(self, job_id, trace="", status="done"):
+        # A resumed job appends the spans of its later runs
+        with self._lock, self._db:
+            self._db.execute("UPDATE jobs SET status=?, finished=?, trace=COALESCE(trace, '') || ? WHERE id=?",
+                             (status, time.time(), trace, job_id))
+
+    def requeue(self, job_id):
+        """Queue a job again; only its pending cases run."""
+        with self._lock, self._db:
+            self._db.execute("UPDATE jobs SET status='queued', finished=NULL WHERE id=?", (job_id,))
+
+    def job(self, job_id):
+        with self._lock:
+            row = self._db.execute(f"SELECT {', '.join(JOB_FIELDS)} FROM jobs WHERE id=?", (job_id,)).fetchone()
+        return dict(zip(JOB_FIELDS, row)) if row else None
+
+    def jobs(self, limit=20):
+        with self._lock:
+            rows = self._db.execute(f"SELECT {', '.join(JOB_FIELDS)} FROM jobs ORDER BY id DESC LIMIT ?",
+                                    (limit,)).fetchall()
+        return [dict(zip(JOB_FIELDS, row)) for row in rows]
+
+    def progress(self, job_id):
+        """{case status: count} for a job."""
+        with self._lock:
+            return dict(self._db.execute("SELECT status, COUNT(*) FROM job_cases WHERE job_id=? GROUP BY status",
+                                         (job_id,)).fetchall())
+
+    def results(self, job_id, statuses=("done",)):
+        """Result dicts of the job's cases in `statuses`, in input order."""
+        with self._lock:
+            rows = self._db.execute(f"SELECT result_json FROM job_cases WHERE job_id=? AND result_json IS NOT NULL "
+                                    f"AND status IN ({', '.join('?' * len(statuses))}) ORDER BY idx",
+                                    (job_id, *statuses)).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def tail(self, job_id, lines=300):
+        """The job's last `lines` log lines, formatted for display."""
+        with self._lock:
+            rows = self._db.execute("SELECT at, message FROM job_log WHERE job_id=? ORDER BY rowid DESC LIMIT ?",
+                                    (job_id, lines)).fetchall()
+        return [f"[{time.strftime('%H:%M:%S', time.localtime(at))}] {message}" for at, message in reversed(rows)]
+
+    def trace(self, job_id):
+        with self._lock:
+            row = self._db.execute("SELECT trace FROM jobs WHERE id=?", (job_id,)).fetchone()
+        return row[0] if row and row[0] else ""
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+def shared():
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = JobQueue()
+        return _shared
@@ -0,0 +1,361 @@
+import os
+import socket
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+from datetime import datetime
+import job_queue
+from worker_pool import HostGate, NetStats, PipelineStats, run_pool
+
+# --- CONFIG ---
+# At most this many cases in flight against the court site at once
+MAX_PER_HOST = 2
+# Politeness: minimum seconds between page loads on the same host
+REQUEST_INTERVAL = 1.0
+# Hand order parsing and PDF downloads to their own stages (pipeline.py), so
+# they overlap navigation for the next case; False runs each case end to end
+PIPELINED = True
+# Cases that fail (or are deferred while the site's circuit breaker is open)
+# get one more round at the end of the job instead of holding up the queue
+REQUEUE_FAILED = True
+# Per-case / per-attempt / per-step spans and the run report (False: no tracing at all)
+TRACE = True
+# Extract the text of fetched orders into the search index (order_index.py)
+INDEX_ORDERS = True
+# How often a running job tells the queue its worker is alive (see job_queue.STALE_SECS)
+HEARTBEAT_SECS = 15
+# `work --forever`: how long to sleep when the queue is empty
+POLL_SECS = 5.0
+# Workers started from the app stay up this long with no job to run, so the
+# next job reuses their warm browsers (browser_pool) instead of launching new ones
+WORKER_IDLE_SECS = 30 * 60
+# One worker process drains the queue at a time; others wait their turn
+WORK_LOCK = job_queue.JOBS_DB + ".lock"
+
+_manager = None
+
+def engine_worker(engine, workers, log):
+    """Fetch engine by job engine name: warm headless Chromium slots, or plain HTTP calls."""
+    global _manager
+    if engine == "http":
+        from http_engine import http_worker
+        return http_worker
+    if _manager is None:
+        # Browsers stay up for every job this process runs
+        from browser_install import ensure_chromium
+        from browser_pool import BrowserManager
+        ensure_chromium()
+        _manager = BrowserManager()
+    browsers = _manager.grow(workers)
+    if browsers < workers:
+        log.write(f"🖥️ {browsers} browsers for {workers} workers (browser_pool.MAX_BROWSERS): "
+                  f"the rest wait for a free one")
+    return _manager.worker
+
+
+class JobLog:
+    """Job-level log lines: into the job's log (for the UI) and the rotating file log."""
+
+    def __init__(self, queue, job_id):
+        from live_log import file_logger
+        self.queue = queue
+        self.job_id = job_id
+        self.file = file_logger()
+
+    def to_file(self, lines):
+        for at, message in lines:
+            self.file.info(f"{at:%Y-%m-%d %H:%M:%S} {message.strip()}")
+
+    def extend(self, lines):
+        self.to_file(lines)
+        self.queue.log(self.job_id, lines)
+
+    def write(self, message):
+        self.extend([(datetime.now(), message)])
+
+    def checkpoint(self, idx, status, result, lines):
+        self.to_file(lines)
+        self.queue.checkpoint(self.job_id, idx, status, result, lines)
+
+@contextmanager
+def heartbeat(queue, job_id):
+    stop = threading.Event()
+
+    def beat():
+        while not stop.wait(HEARTBEAT_SECS):
+            queue.heartbeat(job_id)
+    thread = threading.Thread(target=beat, daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def fill_site_values(todo, log, throttle):
+    """
+    Give every case its hcservices #case_type option value: from the values
+    known so far or, when one is missing, read once from the live dropdown.
+    Returns `(unknown, held)`: the (idx, case) pairs whose type the loaded
+    dropdown doesn't offer, and those still without a value because the
+    dropdown couldn't be read (site down, breaker open).
+    """
+    from case_type_map import learn_site_values, site_value
+
+    def fill():
+        for _, case in todo:
+            case['value'] = case.get('value') or site_value(case['name'])
+        return [(idx, case) for idx, case in todo if not case['value']]
+
+    missing = fill()
+    if not missing: return [], []
+    from http_engine import fetch_case_types, new_session, start_session
+    try:
+        with new_session() as session:
+            throttle()
+            start_session(session)
+            throttle()
+            found = learn_site_values(fetch_case_types(session))
+    except Exception as e:
+        log.write(f"⚠️ Could not read the site's case types ({e}): {len(missing)} case(s) held back")
+        return [], missing
+    log.write(f"🗂️ Read {found} case types from the site's dropdown")
+    return fill(), []
+
+def run_job(queue, job):
+    """
+    Run a claimed job's pending cases. Every case is checkpointed as soon
+    as its result comes back; cases that fail in the first round stay
+    pending until the requeue round settles them. Cases held back because
+    the site's case types couldn't be read get one more try then, and
+    otherwise stay pending (the job ends "failed", for `requeue`).
+    """
+    from scraper import URL
+    import case_state
+    import order_cache
+    import order_index
+    from tracing import Tracer
+    job_id, workers, incremental, orders = job["id"], job["workers"], bool(job["incremental"]), job["orders"]
+    log = JobLog(queue, job_id)
+    tracer = Tracer() if TRACE else None
+    todo = queue.pending(job_id)
+    log.write(f"🚀 Starting Robot... ({workers} workers, {job['engine']}, {orders} orders, job {job_id}, "
+              f"{len(todo)} cases to go)")
+    gate = HostGate(MAX_PER_HOST, REQUEST_INTERVAL)
+
+    def runnable(cases):
+        """Cases the search can run: with a site value and, when incremental, due."""
+        # Imported cases name their type; the search needs the dropdown's value
+        unknown, held = fill_site_values(cases, log, gate.throttle(URL))
+        for idx, case in unknown:
+            log.checkpoint(idx, "failed", False, [(datetime.now(), f"❌ No '{case['name']}' case type on the site: "
+                                                                   f"{case['name']} {case['no']}/{case['year']}")])
+        cases = [(idx, case) for idx, case in cases if case['value']]
+        # Incremental mode: only cases whose refresh interval elapsed, and only
+        # changed order tables are reported
+        if incremental and cases:
+            due = {id(case) for case in case_state.shared().due([case for _, case in cases])}
+            for idx, case in cases:
+                if id(case) not in due: queue.checkpoint(job_id, idx, "skipped")
+            log.write(f"⏭️ Incremental: {len(due)} of {len(cases)} cases due")
+            cases = [(idx, case) for idx, case in cases if id(case) in due]
+        return cases, held
+
+    todo, held = runnable(todo)
+    changed = 0
+    # Full-history downloads only exist as a pipeline stage
+    pipelined = PIPELINED or orders != "latest"
+
+    cache = order_cache.shared()
+    hits, misses = cache.stats()
+    net = NetStats()
+    worker = engine_worker(job["engine"], workers, log) if todo or held else None
+    stages = PipelineStats()
+    index = order_index.shared() if INDEX_ORDERS and order_index.available() else None
+    if INDEX_ORDERS and not index:
+        log.write("🔎 Search index off: no PDF text extractor installed (pip install pypdf)")
+    index_start = (index.indexed, index.skipped, index.failed) if index else None
+
+    def start(batch):
+        if pipelined:
+            from pipeline import run_cases
+            return run_cases(batch, worker, workers, gate.throttle(URL), gate.slot(URL), net, stages, tracer, orders)
+        return run_pool(batch, lambda: worker(gate.throttle(URL), net),
+                        workers=workers, slot=gate.slot(URL), tracer=tracer)
+
+    batch, last_round = todo, not REQUEUE_FAILED
+    while batch or held:
+        failed = []
+        # Workers run concurrently, but results come back (and are checkpointed) in input order
+        for (idx, _), (case, result, lines) in zip(batch, start([case for _, case in batch]) if batch else ()):
+            case_label = f"{case['name']} {case['no']}/{case['year']}"
+            now = datetime.now()
+            lines = [(lines[0][0] if lines else now, f"\n📂 PROCESSING: {case_label}")] + lines
+            if result is False and not last_round:
+                failed.append((idx, case))
+                log.extend(lines + [(now, f"🔁 Failed for now, requeued at the end: {case_label}")])
+                continue
+            if result is False:
+                status, lines = "failed", lines + [(now, f"❌ Failed all retries for {case_label}")]
+            elif result is None:
+                status = "empty"
+            elif incremental and not result.get("changed"):
+                status, lines = "unchanged", lines + [(now, "💤 No change since last check")]
+            else:
+                status = "done"
+                changed += result.get("changed", False)
+            log.checkpoint(idx, status, result, lines)
+            if result and index:
+                order_index.index_result(index, case, result)
+        if last_round or not (failed or held): break
+        # Cases deferred by an open breaker would only be turned away again:
+        # wait out what's left of its cooldown, once for the whole round
+        cooldown = gate.breaker(URL).remaining()
+        if cooldown:
+            log.write(f"⏳ Site breaker open: waiting {cooldown:.0f}s for it to recover")
+            time.sleep(cooldown)
+        if held:
+            # The case type dropdown couldn't be read: one more try, for the second round
+            resolved, held = runnable(held)
+            failed += resolved
+        if failed: log.write(f"\n🔁 Second round for {len(failed)} failed case(s)")
+        batch, last_round = failed, True
+
+    hits, misses = cache.hits - hits, cache.misses - misses
+    log.write(f"💾 Order cache: {hits} hits / {misses} misses")
+    log.write(f"🌐 Network: {net.summary()}")
+    trips = gate.breaker(URL).trips
+    if trips:
+        log.write(f"⛔ Circuit breaker tripped {trips} time(s)")
+    if pipelined and todo:
+        log.write(f"📊 Stages: {stages.summary()}")
+    if incremental:
+        log.write(f"🆕 {changed} case(s) changed")
+    if index:
+        index.wait()
+        indexed, skipped, failed = (index.indexed - index_start[0], index.skipped - index_start[1],
+                                    index.failed - index_start[2])
+        log.write(f"🔎 Search index: {indexed} PDFs indexed, {skipped} skipped (same PDF already indexed)"
+                  + (f", {failed} unreadable" if failed else ""))
+    if held:
+        # Still pending: `requeue` runs them once the site answers again
+        log.write(f"⏸️ {len(held)} case(s) left pending, the site's case types could not be read. "
+                  f"Requeue job {job_id} to run them.")
+    log.write("\n🏁 Batch Complete!")
+    queue.finish(job_id, tracer.jsonl() if tracer else "", "failed" if held else "done")
+
+def run_cnr_job(queue, job):
+    """Resolve the CNRs of a claimed "cnr" job's pending cases, checkpointing each as it comes back."""
+    from browser_install import ensure_chromium
+    from cnr_resolver import resolve_cnrs
+    from tracing import Tracer
+    job_id = job["id"]
+    log = JobLog(queue, job_id)
+    tracer = Tracer() if TRACE else None
+    todo = queue.pending(job_id)
+    log.write(f"🔖 Resolving CNRs for {len(todo)} cases ({job['workers']} sessions, job {job_id})")
+    if todo: ensure_chromium()
+    for (idx, _), (case, cnr, lines) in zip(todo, resolve_cnrs([case for _, case in todo], job["workers"],
+                                                               tracer=tracer)):
+        case_label = f"{case['name']} {case['no']}/{case['year']}"
+        lines = [(lines[0][0] if lines else datetime.now(), f"\n📂 {case_label}")] + lines
+        status = "done" if cnr else ("failed" if cnr is False else "empty")
+        log.checkpoint(idx, status, {"label": case_label, "cnr": cnr}, lines)
+    log.write("\n🏁 CNR lookup complete!")
+    queue.finish(job_id, tracer.jsonl() if tracer else "")
+
+def _drain(queue, forever, poll, idle):
+    name = f"{socket.gethostname()}:{os.getpid()}"
+    ran, idle_since = 0, time.monotonic()
+    while True:
+        job = queue.claim(name)
+        if job is None:
+            if not forever and (idle is None or time.monotonic() - idle_since >= idle): return ran
+            time.sleep(poll)
+            continue
+        print(f"▶️ Job {job['id']} ({job['engine']})")
+        with heartbeat(queue, job["id"]):
+            try:
+                (run_cnr_job if job["engine"] == "cnr" else run_job)(queue, job)
+            except Exception as e:
+                # Don't loop on a broken job: park it, `requeue` runs its pending cases again
+                JobLog(queue, job["id"]).write(f"💥 Job failed: {e}")
+                queue.finish(job["id"], status="failed")
+                traceback.print_exc()
+        print(f"⏹️ Job {job['id']}: {queue.progress(job['id'])}")
+        ran += 1
+        idle_since = time.monotonic()
+
+def work(queue=None, forever=False, poll=POLL_SECS, idle=None):
+    """
+    Drain the queue: claim and run jobs until none is left, keep polling
+    with `forever`, or until no job came for `idle` seconds. Returns the
+    number of jobs run. Workers wait their turn, except with `idle`: then
+    a worker that is already up gets the job and this one exits at once.
+    """
+    from browser_install import FileLock
+    queue = queue or job_queue.shared()
+    lock = FileLock(WORK_LOCK)
+    ran = 0
+    while True:
+        if not lock.acquire(blocking=idle is None): return ran
+        try:
+            ran += _drain(queue, forever, poll, idle)
+        finally:
+            lock.release()
+        # A worker spawned while this one was timing out saw the lock still
+        # held and left: a job queued then is this worker's to run
+        if idle is None or not queue.queued(): return ran
+
+def spawn_worker():
+    """
+    Start a detached `work` process that outlives the app's reruns and
+    stays up WORKER_IDLE_SECS after its last job, keeping its browsers
+    warm; it exits at once if such a worker is already up.
+    """
+    import subprocess
+    import sys
+    kwargs = {"start_new_session": True} if os.name == "posix" else {"creationflags": subprocess.DETACHED_PROCESS}
+    subprocess.Popen([sys.executable, os.path.abspath(__file__), "work", "--idle", str(WORKER_IDLE_SECS)],
+                     cwd=os.path.dirname(os.path.abspath(__file__)),
+                     stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, **kwargs)
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Fetch jobs: queue a case list, drain the queue (e.g. from cron), show progress.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    submit = commands.add_parser("submit", help="queue a CSV/XLSX case list as a new job")
+    submit.add_argument("path")
+    submit.add_argument("--engine", choices=("http", "browser", "cnr"), default="http",
+                        help="fetch orders over HTTP or in a browser, or resolve CNRs (cnr_resolver)")
+    submit.add_argument("--workers", type=int, default=3)
+    submit.add_argument("--incremental", action="store_true", help="only cases due for a re-check; report changes")
+    submit.add_argument("--orders", choices=("latest", "new", "all"), default="latest",
+                        help="newest order only, every order not downloaded yet, or every order")
+    drain = commands.add_parser("work", help="run queued jobs (and resume interrupted ones) until the queue is empty")
+    drain.add_argument("--forever", action="store_true", help="keep polling for new jobs")
+    drain.add_argument("--idle", type=float, metavar="SECS",
+                       help="keep polling until no job came for SECS; exit at once if another worker is up")
+    requeue = commands.add_parser("requeue", help="queue a failed or finished job's pending cases again")
+    requeue.add_argument("job", type=int)
+    commands.add_parser("status", help="recent jobs and their progress")
+    args = parser.parse_args()
+
+    queue = job_queue.shared()
+    if args.command == "submit":
+        from case_import import import_cases
+        with open(args.path, "rb") as f:
+            report = import_cases(f, args.path)
+        job_id = queue.submit(report.cases, args.engine, args.workers, args.incremental, args.orders)
+        print(f"Job {job_id}: {len(report.cases)} cases queued ({report.duplicates} duplicates, {len(report.errors)} invalid rows)")
+    elif args.command == "work":
+        print(f"{work(queue, args.forever, idle=args.idle)} job(s) run")
+    elif args.command == "requeue":
+        queue.requeue(args.job)
+    else:
+        for job in queue.jobs():
+            print(f"{job['id']:>5}  {job['status']:<8} {job['engine']:<8} "
+                  f"{datetime.fromtimestamp(job['created']):%Y-%m-%d %H:%M}  {queue.progress(job['id'])}")
@@ -0,0 +1,62 @@
+import logging
+import os
+import time
+from collections import deque
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+
+# --- CONFIG ---
+LOG_FILE = os.environ.get("HC_LOG_FILE", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "logs", "hc-bot.log"))
+LOG_MAX_MB = 5
+LOG_BACKUPS = 3
+# Lines kept on screen; the log file has every line
+SCREEN_LINES = 300
+# Redraw the on-screen log at most this often, or once this many lines are waiting
+FLUSH_MS = 250
+FLUSH_LINES = 50
+
+
+def file_logger():
+    """Process-wide rotating file log (set up once, Streamlit reruns reuse it)."""
+    logger = logging.getLogger("hc_bot.run")
+    if not logger.handlers:
+        os.makedirs(os.path.dirname(LOG_FILE), exist_ok=True)
+        handler = RotatingFileHandler(LOG_FILE, maxBytes=LOG_MAX_MB * 1024 * 1024,
+                                      backupCount=LOG_BACKUPS, encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+    return logger
+
+def screen_buffer():
+    return deque(maxlen=SCREEN_LINES)
+
+
+class LiveLog:
+    """
+    The run log: every line goes to the rotating file, the last SCREEN_LINES
+    to `placeholder`, redrawn in batches so each redraw costs the same no
+    matter how long the run gets.
+    """
+
+    def __init__(self, placeholder, lines=None):
+        self.placeholder = placeholder
+        self.lines = screen_buffer() if lines is None else lines
+        self.file = file_logger()
+        self.pending = 0
+        self.flushed = 0.0
+
+    def write(self, message, at=None):
+        at = at or datetime.now()
+        self.lines.append(f"[{at:%H:%M:%S}] {message}")
+        self.file.info(f"{at:%Y-%m-%d %H:%M:%S} {message.strip()}")
+        self.pending += 1
+        if self.pending >= FLUSH_LINES or (time.monotonic() - self.flushed) * 1000 >= FLUSH_MS:
+            self.flush()
+
+    def flush(self):
+        if not self.pending: return
+        self.placeholder.code("\n".join(self.lines), language="bash")
+        self.pending = 0
+        self.flushed = time.monotonic()
@@ -0,0 +1,191 @@
+import hashlib
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+# --- CONFIG ---
+CACHE_DIR = os.environ.get("HC_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "orders"))
+MAX_CACHE_MB = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    sha TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS orders (
+    case_type TEXT NOT NULL,
+    case_no TEXT NOT NULL,
+    case_year TEXT NOT NULL,
+    order_date TEXT NOT NULL,
+    url TEXT,
+    sha TEXT NOT NULL REFERENCES blobs(sha),
+    PRIMARY KEY (case_type, case_no, case_year, order_date)
+);
+CREATE TABLE IF NOT EXISTS order_urls (
+    url TEXT PRIMARY KEY,
+    case_type TEXT NOT NULL,
+    case_no TEXT NOT NULL,
+    case_year TEXT NOT NULL,
+    order_no TEXT,
+    order_date TEXT NOT NULL,
+    sha TEXT NOT NULL REFERENCES blobs(sha)
+);
+CREATE INDEX IF NOT EXISTS blobs_lru ON blobs(last_used);
+"""
+
+
+class OrderCache:
+    """
+    Content-addressed order-PDF store: blob files named by SHA-256 plus a
+    SQLite index from (case type, number, year, order date), and from order
+    URL, to blob. Least recently used blobs are evicted once the store
+    passes `max_bytes`. Safe to share between worker threads.
+    """
+
+    def __init__(self, root=CACHE_DIR, max_bytes=MAX_CACHE_MB * 1024 * 1024):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.hits = self.misses = 0
+        os.makedirs(os.path.join(root, "blobs"), exist_ok=True)
+        os.makedirs(os.path.join(root, "tmp"), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(root, "index.sqlite"), check_same_thread=False)
+        self._db.executescript(SCHEMA)
+
+    def _path(self, sha):
+        return os.path.join(self.root, "blobs", sha[:2], sha + ".pdf")
+
+    @staticmethod
+    def _key(case, order_date):
+        return (case['value'], str(case['no']), str(case['year']), order_date)
+
+    def get(self, case, order_date, url=None):
+        """
+        Path of the cached PDF for this case's order of `order_date`, or None.
+        With `url`, an order a full-history download stored from that URL
+        counts too (and is filed under the case and date from then on).
+        """
+        key = self._key(case, order_date)
+        with self._lock:
+            row = self._db.execute(
+                "SELECT sha FROM orders WHERE case_type=? AND case_no=? AND case_year=? AND order_date=?",
+                key).fetchone()
+            if url and not (row and os.path.exists(self._path(row[0]))):
+                row = self._db.execute("SELECT sha FROM order_urls WHERE url=?", (url,)).fetchone()
+                if row and os.path.exists(self._path(row[0])):
+                    self._db.execute("INSERT OR REPLACE INTO orders VALUES (?, ?, ?, ?, ?, ?)", key + (url, row[0]))
+            if row and os.path.exists(self._path(row[0])):
+                self._db.execute("UPDATE blobs SET last_used=? WHERE sha=?", (time.time(), row[0]))
+                self._db.commit()
+                self.hits += 1
+                return self._path(row[0])
+            self.misses += 1
+            return None
+
+    def find_url(self, url):
+        """Path of an already stored order downloaded from `url`, or None."""
+        with self._lock:
+            row = self._db.execute("SELECT sha FROM order_urls WHERE url=?", (url,)).fetchone()
+            if row and os.path.exists(self._path(row[0])):
+                self._db.execute("UPDATE blobs SET last_used=? WHERE sha=?", (time.time(), row[0]))
+                self._db.commit()
+                self.hits += 1
+                return self._path(row[0])
+            self.misses += 1
+            return None
+
+    def spool(self, chunks):
+        """
+        Write an iterable of byte chunks to the store, hashing on the way, so
+        a download never sits in memory whole. Returns (sha, size, duplicate);
+        `duplicate` when the same bytes were already stored (the copy is dropped).
+        The blob is only reachable once indexed (index_order / index_url).
+        """
+        digest, size = hashlib.sha256(), 0
+        fd, tmp = tempfile.mkstemp(dir=os.path.join(self.root, "tmp"))
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in chunks:
+                    digest.update(chunk)
+                    f.write(chunk)
+                    size += len(chunk)
+        except BaseException:
+            os.remove(tmp)
+            raise
+        sha = digest.hexdigest()
+        path = self._path(sha)
+        with self._lock:
+            duplicate = os.path.exists(path)
+            if duplicate:
+                os.remove(tmp)
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(tmp, path)
+            self._db.execute("INSERT OR REPLACE INTO blobs (sha, size, last_used) VALUES (?, ?, ?)",
+                             (sha, size, time.time()))
+            self._evict(keep=sha)
+            self._db.commit()
+        return sha, size, duplicate
+
+    def index_order(self, case, order_date, url, sha):
+        """File a spooled blob as the case's order of `order_date` (and under its URL); returns its path."""
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO orders VALUES (?, ?, ?, ?, ?, ?)",
+                             self._key(case, order_date) + (url, sha))
+            if url:
+                self._db.execute("INSERT OR REPLACE INTO order_urls VALUES (?, ?, ?, ?, NULL, ?, ?)",
+                                 (url,) + self._key(case, order_date) + (sha,))
+            self._db.commit()
+        return self._path(sha)
+
+    def index_url(self, case, order, url, sha):
+        """File a spooled blob under its URL only, for an order_history.Order of a full-history download."""
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO order_urls VALUES (?, ?, ?, ?, ?, ?, ?)",
+                             (url,) + self._key(case, order.date_str)[:3] + (order.number, order.date_str, sha))
+            self._db.commit()
+        return self._path(sha)
+
+    def put(self, case, order_date, url, data):
+        """Store PDF bytes and return the blob path."""
+        sha, _, _ = self.spool([data])
+        return self.index_order(case, order_date, url, sha)
+
+    def _evict(self, keep=None):
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+        if total <= self.max_bytes: return
+        for sha, size in self._db.execute("SELECT sha, size FROM blobs ORDER BY last_used").fetchall():
+            if total <= self.max_bytes: break
+            if sha == keep: continue  # just spooled, not indexed yet
+            self._db.execute("DELETE FROM orders WHERE sha=?", (sha,))
+            self._db.execute("DELETE FROM order_urls WHERE sha=?", (sha,))
+            self._db.execute("DELETE FROM blobs WHERE sha=?", (sha,))
+            try: os.remove(self._path(sha))
+            except OSError: pass
+            total -= size
+
+    def stats(self):
+        return self.hits, self.misses
+
+    def entries(self):
+        """(case type, number, year, order date, path) of every stored order, by date and by URL."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT case_type, case_no, case_year, order_date, sha FROM orders UNION "
+                "SELECT case_type, case_no, case_year, order_date, sha FROM order_urls").fetchall()
+        return [row[:4] + (self._path(row[4]),) for row in rows if os.path.exists(self._path(row[4]))]
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+def shared():
+    """Process-wide cache instance (survives Streamlit reruns, shared by workers)."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = OrderCache()
+        return _shared
@@ -0,0 +1,108 @@
+import itertools
+import time
+from contextlib import nullcontext
+from typing import NamedTuple
+import order_cache
+from order_history import latest_order, order_table_fingerprint, parse_orders
+from scraper import BASE_URL, PDF_MAGIC, looks_like_pdf, make_result, record_download, settle
+
+# --- CONFIG ---
+# Which orders a case fetches: "latest" (the newest only, as always), "new"
+# (every order not stored yet) or "all" (every order; stored ones are reused)
+ORDER_MODES = ("latest", "new", "all")
+# Parallel order downloads per download worker, over its pooled session
+ORDER_WORKERS = 4
+# Bodies are streamed to the order cache in chunks of this size
+CHUNK_BYTES = 64 * 1024
+
+
+class HistoryPlan(NamedTuple):
+    orders: dict       # absolute URL -> order_history.Order, first row wins
+    newest: object     # latest_order() of the table
+    fingerprint: str
+
+
+def _head(chunks):
+    """Read just enough of a streamed body for the magic check."""
+    head = b""
+    for chunk in chunks:
+        head += chunk
+        if len(head) >= len(PDF_MAGIC): break
+    return head
+
+def download_order(session, url, cookies, log, throttle=None):
+    """
+    Stream one order PDF into the order cache. Headers and the first bytes
+    are checked before anything is written, and the body never sits in
+    memory whole. Returns the blob's sha (index it with the cache's
+    index_order / index_url), or None when the site sent no PDF.
+    """
+    from http_engine import TIMEOUT
+    if throttle: throttle()
+    start = time.perf_counter()
+    with session.get(url, cookies=cookies, timeout=TIMEOUT, stream=True) as response:
+        chunks = response.iter_content(CHUNK_BYTES)
+        head = _head(chunks) if response.status_code == 200 else b""
+        if not looks_like_pdf(response.status_code, response.headers.get("content-type", ""), head):
+            return None
+        sha, size, duplicate = order_cache.shared().spool(itertools.chain([head], chunks))
+    record_download(log, time.perf_counter() - start, size)
+    if duplicate: log("💾 Same PDF already stored under another order")
+    return sha
+
+def plan_history(case, history, log):
+    """
+    Parse half of a full-history download: the unique order links of the
+    table, or the settled result (None) when there are no orders.
+    """
+    fingerprint = order_table_fingerprint(history)
+    rows = parse_orders(history)
+    if not rows:
+        log("⚠️ No orders found in history.")
+        return settle(case, None, fingerprint, None, log)
+    orders = {}
+    for order in rows:
+        orders.setdefault(BASE_URL + order.link, order)
+    return HistoryPlan(orders, latest_order(rows), fingerprint)
+
+def download_history(session, pool, case, plan, cookies, log, throttle=None, mode="new", slot=None):
+    """
+    Download half: every order of a HistoryPlan not stored yet (by URL),
+    fetched on `pool` (a ThreadPoolExecutor) over `session`, each download
+    holding `slot` (the per-host cap), if given. The case result
+    is the newest order shown, with the orders of the run under "orders":
+    every stored order for mode "all", only the newly downloaded ones for
+    "new". Returns False when a download failed, so the case is retried;
+    orders already stored are not fetched again then.
+    """
+    cache = order_cache.shared()
+    stored = {url: cache.find_url(url) for url in plan.orders}
+    todo = [url for url, path in stored.items() if path is None]
+    log(f"📚 {len(plan.orders)} orders: {len(plan.orders) - len(todo)} already stored, {len(todo)} to download")
+
+    def fetch(url):
+        try:
+            with slot or nullcontext():
+                sha = download_order(session, url, cookies, log, throttle)
+        except Exception as e:
+            log(f"❌ Order {plan.orders[url].number}: {e}")
+            return False
+        if sha is None:
+            log(f"⚠️ Order {plan.orders[url].number} ({plan.orders[url].date_str}): file missing/not uploaded.")
+            return None
+        return cache.index_url(case, plan.orders[url], url, sha)
+
+    fetched = dict(zip(todo, pool.map(fetch, todo)))
+    if False in fetched.values(): return False
+    if todo: log(f"✅ {sum(bool(path) for path in fetched.values())} of {len(todo)} orders downloaded")
+    stored.update(fetched)
+
+    picked = [url for url, path in stored.items() if path and (mode == "all" or url in fetched)]
+    picked.sort(key=lambda url: plan.orders[url].date, reverse=True)
+    result = None
+    if not picked and mode == "new":
+        log("💤 No new orders")
+    if picked:
+        orders = [make_result(case, plan.orders[url].date_str, stored[url]) for url in picked]
+        result = dict(orders[0], orders=orders)
+    return settle(case, plan.newest.date_str, plan.fingerprint, result, log)
@@ -0,0 +1,134 @@
+import hashlib
+import re
+from datetime import date
+from html.parser import HTMLParser
+from typing import NamedTuple
+
+# Fast parsers are optional; the stdlib fallback needs nothing extra
+try:
+    from selectolax.lexbor import LexborHTMLParser as _Selectolax
+except ImportError:
+    try:
+        from selectolax.parser import HTMLParser as _Selectolax
+    except ImportError:
+        _Selectolax = None
+try:
+    import lxml.html as _lxml
+except ImportError:
+    _lxml = None
+
+ORDER_TABLE = re.compile(r"<table[^>]*class=[\"'][^\"']*order_table.*?</table>", re.S | re.I)
+_TAGS = re.compile(r"<[^>]+>|\s+")
+
+
+class Order(NamedTuple):
+    number: str
+    judge: str
+    date: date
+    link: str
+
+    @property
+    def date_str(self):
+        return self.date.strftime("%d-%m-%Y")
+
+
+def extract_order_table(html_content):
+    """Slice just the order_table out of a full page, so parsers skip the rest."""
+    match = ORDER_TABLE.search(html_content)
+    return match.group(0) if match else ""
+
+def order_table_fingerprint(html_content):
+    """Hash of the order table's visible text; changes whenever an order is added or edited."""
+    text = _TAGS.sub(" ", extract_order_table(html_content)).strip()
+    return hashlib.sha1(text.encode()).hexdigest()
+
+def _parse_date(text):
+    try:
+        d, m, y = text.strip().split("-")
+        return date(int(y), int(m), int(d))
+    except ValueError:
+        return None
+
+def _order(cells, link):
+    # Columns: Order Number | Order on | Judge | Order Date | Order Details (link)
+    if len(cells) < 5 or not link: return None
+    day = _parse_date(cells[3])
+    return Order(cells[0], cells[2], day, link) if day else None
+
+
+class _TableParser(HTMLParser):
+    """Stdlib fallback: one pass over the table, collecting cell text and the first link per cell."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.orders = []
+        self.cells = None
+        self.text = None
+        self.links = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "tr":
+            self.cells, self.links = [], []
+        elif tag == "td" and self.cells is not None:
+            self.text = []
+            self.links.append(None)
+        elif tag == "a" and self.text is not None and self.links[-1] is None:
+            self.links[-1] = dict(attrs).get("href")
+
+    def handle_endtag(self, tag):
+        if tag == "td" and self.text is not None:
+            self.cells.append(" ".join("".join(self.text).split()))
+            self.text = None
+        elif tag == "tr" and self.cells is not None:
+            order = _order(self.cells, self.links[4] if len(self.links) > 4 else None)
+            if order: self.orders.append(order)
+            self.cells = None
+
+    def handle_data(self, data):
+        if self.text is not None:
+            self.text.append(data)
+
+def _parse_selectolax(table_html):
+    orders = []
+    for tr in _Selectolax(table_html).css("tr"):
+        tds = tr.css("td")
+        if len(tds) < 5: continue
+        link = tds[4].css_first("a")
+        order = _order([td.text(strip=True) for td in tds], link.attributes.get("href") if link else None)
+        if order: orders.append(order)
+    return orders
+
+def _parse_lxml(table_html):
+    orders = []
+    for tr in _lxml.fromstring(table_html).iter("tr"):
+        tds = tr.findall("td")
+        if len(tds) < 5: continue
+        links = tds[4].xpath(".//a/@href")
+        order = _order([" ".join(td.text_content().split()) for td in tds], links[0] if links else None)
+        if order: orders.append(order)
+    return orders
+
+def _parse_stdlib(table_html):
+    parser = _TableParser()
+    parser.feed(table_html)
+    parser.close()
+    return parser.orders
+
+def parse_orders(html_content):
+    """
+    Every order in the history's order_table, in table order, as compact
+    Order records. Accepts either the full page or just the table HTML.
+    """
+    table_html = extract_order_table(html_content)
+    if not table_html: return []
+    if _Selectolax: return _parse_selectolax(table_html)
+    if _lxml: return _parse_lxml(table_html)
+    return _parse_stdlib(table_html)
+
+def latest_order(orders):
+    """Newest order in a single pass (first one wins on equal dates)."""
+    best = None
+    for order in orders:
+        if best is None or order.date > best.date:
+            best = order
+    return best
@@ -0,0 +1,183 @@
+import importlib.util
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+# Text extraction: PyMuPDF when installed (several times faster), else pypdf.
+# Imported on first extraction, so searching from the app loads neither
+EXTRACTORS = ("fitz", "pypdf")
+
+# --- CONFIG ---
+INDEX_DB = os.environ.get("HC_INDEX_DB", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "order_index.sqlite"))
+# Background threads extracting text from newly downloaded PDFs
+INDEX_WORKERS = 2
+# Hits returned per search, and words of context in each snippet
+MAX_HITS = 50
+SNIPPET_WORDS = 16
+
+# Text is indexed once per PDF (by content hash, as in the order cache);
+# refs map each PDF to the case orders it was downloaded as
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (
+    sha TEXT PRIMARY KEY,
+    pages INTEGER NOT NULL,
+    chars INTEGER NOT NULL,
+    indexed REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS refs (
+    case_type TEXT NOT NULL,
+    case_no TEXT NOT NULL,
+    case_year TEXT NOT NULL,
+    case_name TEXT,
+    order_date TEXT NOT NULL,
+    sha TEXT NOT NULL,
+    path TEXT NOT NULL,
+    PRIMARY KEY (case_type, case_no, case_year, order_date, sha)
+);
+CREATE INDEX IF NOT EXISTS refs_sha ON refs (sha);
+CREATE VIRTUAL TABLE IF NOT EXISTS order_text USING fts5 (sha UNINDEXED, body, tokenize='porter unicode61');
+"""
+
+HIT_FIELDS = ("case_name", "case_type", "case_no", "case_year", "order_date", "path", "snippet", "score")
+
+
+def available():
+    return any(importlib.util.find_spec(name) for name in EXTRACTORS)
+
+def extract_text(path):
+    """(text, page count) of a PDF; scanned orders without a text layer give ""."""
+    if importlib.util.find_spec("fitz"):
+        import fitz
+        with fitz.open(path) as doc:
+            return "\n".join(page.get_text() for page in doc), doc.page_count
+    if importlib.util.find_spec("pypdf"):
+        import pypdf
+        reader = pypdf.PdfReader(path)
+        return "\n".join(page.extract_text() or "" for page in reader.pages), len(reader.pages)
+    raise RuntimeError("No PDF text extractor installed (pip install pypdf)")
+
+def _fts_query(text):
+    """Every word as a quoted term, for input that isn't valid FTS5 query syntax."""
+    return " ".join('"' + word.replace('"', '""') + '"' for word in text.split())
+
+
+class OrderIndex:
+    """
+    SQLite FTS5 index over order PDFs. add() records which case order a PDF
+    is and hands text extraction to a background pool, unless that PDF's
+    content hash is already indexed. search() returns ranked hits with
+    highlighted snippets. Safe to share between threads; the extraction
+    threads only start with the first add(), so a search-only index has none.
+    """
+
+    def __init__(self, path=INDEX_DB, workers=INDEX_WORKERS):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+        self._workers = workers
+        self._pool = None
+        self._pending = {}  # sha -> Future
+        self.indexed = self.skipped = self.failed = 0
+
+    def add(self, case, order_date, path):
+        """
+        Index an order-cache PDF (blob files are named by their SHA-256) as
+        `case`'s order of `order_date`. Returns the extraction Future, or
+        None when the same PDF is already indexed or queued.
+        """
+        sha = os.path.splitext(os.path.basename(path))[0]
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO refs VALUES (?, ?, ?, ?, ?, ?, ?)",
+                             (case['value'], str(case['no']), str(case['year']), case.get('name'), order_date, sha, path))
+            self._db.commit()
+            if sha in self._pending or self._db.execute("SELECT 1 FROM docs WHERE sha=?", (sha,)).fetchone():
+                self.skipped += 1
+                return None
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(self._workers, thread_name_prefix="order-index")
+            future = self._pending[sha] = self._pool.submit(self._index, sha, path)
+        return future
+
+    def _index(self, sha, path):
+        try:
+            text, pages = extract_text(path)
+        except Exception:
+            # Unreadable (damaged or not really a PDF): recorded with no text, not retried
+            text, pages = "", 0
+        with self._lock:
+            self._db.execute("INSERT INTO order_text (sha, body) VALUES (?, ?)", (sha, text))
+            self._db.execute("INSERT INTO docs VALUES (?, ?, ?, ?)", (sha, pages, len(text), time.time()))
+            self._db.commit()
+            self._pending.pop(sha, None)
+            if pages: self.indexed += 1
+            else: self.failed += 1
+        return pages
+
+    def wait(self):
+        """Block until every queued extraction has finished."""
+        with self._lock:
+            futures = list(self._pending.values())
+        wait(futures)
+
+    def search(self, query, limit=MAX_HITS):
+        """
+        Ranked hits (best first) for an FTS5 query such as `adjourned`,
+        `"specific performance"` or `rent NEAR(arrears)`; input that isn't
+        valid query syntax is searched word by word.
+        """
+        if not query.strip(): return []
+        sql = ("SELECT r.case_name, r.case_type, r.case_no, r.case_year, r.order_date, r.path, "
+               "snippet(order_text, 1, '**', '**', '…', ?), bm25(order_text) "
+               "FROM order_text JOIN refs r ON r.sha = order_text.sha "
+               "WHERE order_text MATCH ? ORDER BY bm25(order_text) LIMIT ?")
+        with self._lock:
+            try:
+                rows = self._db.execute(sql, (SNIPPET_WORDS, query, limit)).fetchall()
+            except sqlite3.OperationalError:
+                rows = self._db.execute(sql, (SNIPPET_WORDS, _fts_query(query), limit)).fetchall()
+        hits = [dict(zip(HIT_FIELDS, row)) for row in rows]
+        for hit in hits:
+            hit["snippet"] = " ".join(hit["snippet"].split())  # PDF line breaks
+        return hits
+
+    def stats(self):
+        """(PDFs indexed, case orders referencing them)."""
+        with self._lock:
+            docs = self._db.execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+            refs = self._db.execute("SELECT COUNT(*) FROM refs").fetchone()[0]
+        return docs, refs
+
+
+def index_result(index, case, result):
+    """Queue the PDFs of a fetch result (and of its "orders", for full-history downloads)."""
+    for order in result.get("orders") or [result]:
+        if order.get("date") and os.path.exists(order["path"]):
+            index.add(case, order["date"], order["path"])
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+def shared():
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = OrderIndex()
+        return _shared
+
+
+if __name__ == "__main__":
+    # Backfill: index every PDF already in the order cache
+    import order_cache
+    from case_type_map import site_values
+    names = {value: name for name, value in site_values().items()}
+    index = shared()
+    for case_type, case_no, case_year, order_date, path in order_cache.shared().entries():
+        index.add({"value": case_type, "no": case_no, "year": case_year, "name": names.get(case_type)}, order_date, path)
+    index.wait()
+    print(f"{index.indexed} PDFs indexed, {index.skipped} already indexed, {index.failed} unreadable; "
+          "{} PDFs / {} orders in the index".format(*index.stats()))
@@ -0,0 +1,82 @@
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+import order_cache
+from order_download import ORDER_WORKERS, HistoryPlan, download_history, download_order, plan_history
+from scraper import OrderLink, make_result, plan_order, settle_order
+from worker_pool import Next, Stage, run_pipeline
+
+# --- CONFIG ---
+# Order-table parsing and cache checks (CPU only, milliseconds per case)
+PARSE_WORKERS = 2
+# PDF downloads over a pooled HTTP client, in the site session of the lookup
+# (streamed to the order cache; full-history downloads fan out further, see
+# order_download.ORDER_WORKERS)
+DOWNLOAD_WORKERS = 2
+# Bound on each stage's inbox: a full queue stalls the stage feeding it
+QUEUE_SIZE = 4
+
+
+@contextmanager
+def navigate_worker(engine_worker):
+    """Search form, captcha and history view on one engine worker (browser or HTTP)."""
+    with engine_worker as lookup:
+        def handle(case, log):
+            found = lookup(case, log)
+            if not found: return found  # case not found, or every retry failed
+            history, cookies = found
+            return Next((case, history, cookies))
+        yield handle
+
+@contextmanager
+def parse_worker(orders="latest"):
+    plan = plan_order if orders == "latest" else plan_history
+    def handle(job, log):
+        case, history, cookies = job
+        link = plan(case, history, log)
+        return Next((case, link, cookies)) if isinstance(link, (OrderLink, HistoryPlan)) else link
+    yield handle
+
+@contextmanager
+def download_worker(throttle=None, net=None, orders="latest", slot=None):
+    # `slot` is held per request, not per case: full-history downloads fan
+    # out over ORDER_WORKERS threads and must still respect the host cap
+    from http_engine import new_session
+    session = new_session(net)
+    pool = ThreadPoolExecutor(ORDER_WORKERS) if orders != "latest" else None
+    try:
+        def handle(job, log):
+            case, link, cookies = job
+            if isinstance(link, HistoryPlan):
+                return download_history(session, pool, case, link, cookies, log, throttle, orders, slot)
+            with slot or nullcontext():
+                sha = download_order(session, link.url, cookies, log, throttle)
+            result = None
+            if sha:
+                path = order_cache.shared().index_order(case, link.date_str, link.url, sha)
+                result = make_result(case, link.date_str, path)
+            return settle_order(case, link, result, log)
+        yield handle
+    finally:
+        if pool: pool.shutdown()
+        session.close()
+
+def run_cases(cases, engine_worker, workers=1, throttle=None, slot=None, net=None, stats=None, tracer=None,
+              orders="latest"):
+    """
+    Pipelined twin of run_pool(cases, engine_worker...): navigation runs on
+    `workers` engine workers while parsing and PDF downloads for earlier
+    cases proceed on their own threads. `engine_worker` is a worker factory
+    such as scraper.browser_worker; `slot` caps in-flight requests to the
+    court site across the navigate and download stages; `stats` is an
+    optional PipelineStats for queue depths and backpressure; `tracer` an
+    optional tracing.Tracer; `orders` one of order_download.ORDER_MODES.
+
+    Yields `(case, result, log_lines)` in input order, like run_pool.
+    """
+    stages = [
+        Stage("navigate", lambda: navigate_worker(engine_worker(throttle, net, lookup_only=True)), workers,
+              slot=slot),
+        Stage("parse", lambda: parse_worker(orders), PARSE_WORKERS, QUEUE_SIZE),
+        Stage("download", lambda: download_worker(throttle, net, orders, slot), DOWNLOAD_WORKERS, QUEUE_SIZE),
+    ]
+    return run_pipeline(cases, stages, stats, tracer)
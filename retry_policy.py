@@ -0,0 +1,122 @@
+import random
+import threading
+import time
+
+# --- CONFIG ---
+# Attempt outcomes (StepTimer.status) that only cost a new captcha: retried at once
+CAPTCHA_FAILURES = {"blurry", "invalid_captcha"}
+# Attempt never made because the host's breaker was open: the case is requeued
+DEFERRED = "deferred"
+# Everything else (timeouts, errors) backs off exponentially: base * 2^(n-1), capped, with jitter
+BACKOFF_BASE = 2.0
+BACKOFF_CAP = 60.0
+# This many site failures in a row, across all workers, trips the breaker ...
+BREAKER_THRESHOLD = 5
+# ... and new attempts on that host are turned away (deferred) for this long,
+# after which one probe is let through
+BREAKER_COOLDOWN = 60.0
+
+
+def is_site_failure(status):
+    return status not in ("ok", DEFERRED) and status not in CAPTCHA_FAILURES
+
+def backoff_delay(attempt, base=BACKOFF_BASE, cap=BACKOFF_CAP):
+    """Exponential backoff with "equal jitter": half fixed, half random."""
+    delay = min(cap, base * 2 ** (attempt - 1))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+class HostDown(Exception):
+    """Raised by a throttle instead of attempting while the host's breaker is open."""
+
+    def __init__(self):
+        super().__init__("Site is failing repeatedly: case deferred to the end of the batch")
+
+
+class CircuitBreaker:
+    """
+    Per-host breaker shared by every worker. Closed: attempts go through.
+    Open (after `threshold` site failures in a row): attempts are turned
+    away at once for the cooldown. Then half-open: a single probe goes
+    through while other attempts wait for its outcome, which closes the
+    breaker again or re-opens it.
+    """
+
+    def __init__(self, threshold=BREAKER_THRESHOLD, cooldown=BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.probe_at = None  # when the half-open probe was let through
+        self.trips = 0
+        self._cond = threading.Condition()
+
+    @property
+    def is_open(self):
+        with self._cond:
+            return self.opened_at is not None
+
+    def remaining(self):
+        """Seconds left of the cooldown (0 when closed or ready for a probe)."""
+        with self._cond:
+            if self.opened_at is None: return 0.0
+            return max(0.0, self.opened_at + self.cooldown - time.monotonic())
+
+    def allow(self):
+        """
+        True when an attempt may go ahead: the breaker is closed, or this
+        caller is the half-open probe, or the probe it waited for succeeded.
+        False while the breaker is open.
+        """
+        with self._cond:
+            while self.opened_at is not None:
+                now = time.monotonic()
+                if now < self.opened_at + self.cooldown: return False
+                # A probe that never reported back (e.g. a download) doesn't hold the gate forever
+                if self.probe_at is None or now - self.probe_at > self.cooldown:
+                    self.probe_at = now  # half-open: this caller is the probe
+                    return True
+                self._cond.wait(timeout=1.0)
+            return True
+
+    def record(self, status):
+        if status == DEFERRED: return
+        with self._cond:
+            if not is_site_failure(status):
+                # The site answered (even a wrong captcha proves that)
+                self.failures = 0
+                if self.opened_at is not None:
+                    self.opened_at = self.probe_at = None
+                    self._cond.notify_all()
+                return
+            self.failures += 1
+            if self.probe_at is not None or (self.opened_at is None and self.failures >= self.threshold):
+                if self.opened_at is None: self.trips += 1
+                self.opened_at = time.monotonic()
+                self.probe_at = None
+                self._cond.notify_all()
+
+
+def report(throttle, status):
+    """Feed an attempt's outcome to the host's breaker (if the throttle has one)."""
+    breaker = getattr(throttle, "breaker", None)
+    if breaker: breaker.record(status)
+
+def before_retry(throttle, status, attempt, log):
+    """
+    Called between attempts with the previous attempt's status. Captcha
+    failures retry at once; site failures back off, unless the host's
+    breaker is open (or the attempt was deferred by it), in which case the
+    case is given up for now (returns False) so the caller can requeue it
+    at the end of the batch.
+    """
+    if status == DEFERRED: return False
+    if not is_site_failure(status): return True
+    breaker = getattr(throttle, "breaker", None)
+    if breaker and breaker.is_open:
+        log("⛔ Site is failing repeatedly: pausing this case, it will be retried at the end.")
+        return False
+    delay = backoff_delay(attempt)
+    log(f"⏳ Backing off {delay:.1f}s after {status}")
+    time.sleep(delay)
+    return True
@@ -0,0 +1,459 @@
+import os
+import time
+from contextlib import contextmanager
+from typing import NamedTuple
+import captcha
+import case_state
+import order_cache
+import retry_policy
+from order_history import latest_order, order_table_fingerprint, parse_orders
+from tracing import trace_of
+
+# --- CONFIG ---
+# HC_BASE_URL points both engines at another host, e.g. the offline stand-in
+BASE_URL = os.environ.get("HC_BASE_URL", "https://hcservices.ecourts.gov.in/hcservices/")
+URL = BASE_URL + "main.php"
+MAX_RETRIES = 5
+# First bytes of every real order PDF
+PDF_MAGIC = b"%PDF"
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+# These flags prevent the browser from crashing on Streamlit Cloud
+BROWSER_ARGS = [
+    '--no-sandbox',
+    '--disable-dev-shm-usage',  # Crucial for Cloud
+    '--disable-gpu'
+]
+
+# --- RESOURCE POLICY ---
+# Resource types the case-status flow never needs (CSS is kept: visibility
+# checks such as the notice modal depend on it)
+BLOCK_RESOURCE_TYPES = {"image", "font", "media"}
+# Third-party trackers, analytics and banners
+BLOCK_URL_PATTERNS = ("google-analytics", "googletagmanager", "doubleclick", "facebook", "banner", "analytics")
+# Always let through, whatever the rules above say
+ALLOW_URL_PATTERNS = ("securimage", "captcha")
+
+# Upper bound for any single "wait until ready" step in the form flow
+STEP_TIMEOUT = 15000
+MODAL_CLOSE = "button[data-bs-dismiss='modal']"
+# Stay on the configured search form between cases and retries instead of
+# reloading main.php (falls back to a full reload whenever the form is gone)
+REUSE_FORM_SESSION = True
+# Button that leaves the history view for the search form, where there is one
+BACK_TO_FORM = "input[value='Back']"
+# Swaps the captcha image for a fresh one (same trick as the site's own
+# refresh link) and resolves once it has loaded
+REFRESH_CAPTCHA_JS = """img => new Promise((resolve, reject) => {
+    img.onload = () => resolve(img.src);
+    img.onerror = reject;
+    const src = new URL(img.src, location.href);
+    src.searchParams.set("rand", Math.random());
+    img.src = src.href;
+})"""
+# Drops what the previous search left on a reused form (results, history and
+# the "Invalid Captcha" message), so the next submit waits on its own response
+CLEAR_RESULTS_JS = """() => {
+    document.querySelectorAll("#dispTable, .order_table").forEach(el => el.remove());
+    const text = document.createTreeWalker(document.body, NodeFilter.SHOW_TEXT);
+    const stale = [];
+    while (text.nextNode()) if (text.currentNode.nodeValue.includes("Invalid Captcha")) stale.push(text.currentNode);
+    stale.forEach(node => node.remove());
+}"""
+
+
+class ResourcePolicy:
+    """
+    Aborts requests the flow doesn't need, via context.route, and counts what
+    goes over the wire into a NetStats (swappable per run, since warm
+    contexts outlive a run).
+    """
+
+    def __init__(self, block_types=BLOCK_RESOURCE_TYPES, block_patterns=BLOCK_URL_PATTERNS,
+                 allow_patterns=ALLOW_URL_PATTERNS):
+        self.block_types = block_types
+        self.block_patterns = block_patterns
+        self.allow_patterns = allow_patterns
+        self.stats = None
+
+    def attach(self, context):
+        context.route("**/*", self._route)
+        context.on("response", self._on_response)
+        return self
+
+    def allows(self, url, resource_type):
+        url = url.lower()
+        if any(p in url for p in self.allow_patterns): return True
+        if resource_type in self.block_types: return False
+        return not any(p in url for p in self.block_patterns)
+
+    def _route(self, route):
+        request = route.request
+        if self.allows(request.url, request.resource_type):
+            route.continue_()
+        else:
+            if self.stats: self.stats.add(blocked=True)
+            route.abort()
+
+    def _on_response(self, response):
+        if self.stats:
+            # Content-Length when the server sends it (approximate otherwise)
+            self.stats.add(int(response.headers.get("content-length") or 0))
+
+class CaptchaTap:
+    """
+    Remembers the page's recent image responses so the captcha can be read
+    from the bytes the browser already downloaded, without a screenshot.
+    """
+
+    KEEP = 20
+
+    def __init__(self, page):
+        self.responses = {}
+        page.on("response", self._on_response)
+
+    def _on_response(self, response):
+        if response.request.resource_type != "image": return
+        self.responses[response.url] = response
+        if len(self.responses) > self.KEEP:
+            self.responses.pop(next(iter(self.responses)))
+
+    def pop(self, url):
+        return self.responses.pop(url, None)
+
+def capture_captcha(page, tap=None):
+    """
+    Return (image bytes, how) for the current #captcha_image. Uses the
+    intercepted response when available, otherwise re-requests the image
+    over the page's request context (same cookies, so the session's captcha
+    code follows the bytes we read).
+    """
+    page.wait_for_selector("#captcha_image", state="visible", timeout=3000)
+    src = page.eval_on_selector("#captcha_image", "img => img.src")
+    response = tap.pop(src) if tap else None
+    if response is not None:
+        try:
+            response.finished()
+            return response.body(), "intercepted"
+        except Exception:
+            pass
+    response = page.request.get(src)
+    return response.body(), "fetched"
+
+def solve_captcha(page, tap=None, log=None):
+    try:
+        start = time.perf_counter()
+        captcha_bytes, how = capture_captcha(page, tap)
+        if log: log(f"🧩 Captcha {how} in {(time.perf_counter() - start) * 1000:.0f} ms")
+        return captcha.solve(captcha_bytes), captcha_bytes
+    except: return "", None
+
+def get_latest_order_link(html_content):
+    latest = latest_order(parse_orders(html_content))
+    if not latest: return None, None
+    return latest.date_str, latest.link
+
+def settle(case, date_str, fingerprint, result, log):
+    """Record a finished check in the case state store and flag the result as changed or not."""
+    changed = case_state.shared().observe(case, date_str, fingerprint)
+    if changed: log("🆕 Order history changed since last check")
+    if result: result["changed"] = changed
+    return result
+
+def make_result(case, date_str, path):
+    # Results carry only metadata and the on-disk PDF path, never the bytes
+    return {
+        "label": f"{case['no']}/{case['year']}",
+        "desc": f"{case['name']} (Order: {date_str})",
+        "date": date_str,
+        "path": path
+    }
+
+def cached_order(case, date_str, log, url=None):
+    """Result from the on-disk order cache when this order was already downloaded (by date, or from `url`)."""
+    path = order_cache.shared().get(case, date_str, url)
+    if path is None:
+        log("💾 Cache miss")
+        return None
+    log(f"💾 Cache hit: order {date_str} unchanged, download skipped")
+    return make_result(case, date_str, path)
+
+def store_order(case, date_str, url, data):
+    """Spool a downloaded PDF to the order cache and return its result."""
+    return make_result(case, date_str, order_cache.shared().put(case, date_str, url, data))
+
+class StepTimer:
+    """Wall time per named step of one attempt, for the run log and the trace."""
+
+    def __init__(self):
+        self.steps = []
+        self.status = "ok"
+        self.reason = ""
+
+    def fail(self, status, reason=""):
+        self.status, self.reason = status, reason
+
+    @contextmanager
+    def step(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.steps.append((name, time.perf_counter() - start))
+
+    def summary(self):
+        return " · ".join(f"{name} {secs * 1000:.0f}ms" for name, secs in self.steps)
+
+    def finish(self, attempt, log):
+        log(f"⏱️ Attempt {attempt}: {self.summary()}")
+        trace = trace_of(log)
+        if trace: trace.attempt(attempt, self.steps, self.status, self.reason)
+
+def record_download(log, secs, nbytes):
+    log(f"⏱️ Download: {secs * 1000:.0f}ms")
+    trace = trace_of(log)
+    if trace: trace.span("download", secs, nbytes=nbytes)
+
+# --- NAVIGATION LAYER ---
+# Every step waits on the condition it actually needs (option present,
+# element enabled, result rendered) instead of a fixed pause.
+def prepare_page(page):
+    # Dismiss the notice modal whenever it shows up and blocks an action
+    page.add_locator_handler(page.locator(MODAL_CLOSE), lambda btn: btn.click())
+
+def select_when_ready(page, selector, value):
+    page.wait_for_selector(f"{selector} option[value='{value}']", state="attached", timeout=STEP_TIMEOUT)
+    page.select_option(selector, value=value)
+
+def open_search_form(page, timer, url=None):
+    with timer.step("goto"):
+        page.goto(url or URL, timeout=60000)
+    with timer.step("menu"):
+        page.locator("#leftPaneMenuCS").click()
+        if page.locator(MODAL_CLOSE).is_visible():
+            page.locator(MODAL_CLOSE).click()
+    with timer.step("state"):
+        select_when_ready(page, "#sess_state_code", "1")
+    with timer.step("court"):
+        select_when_ready(page, "#court_complex_code", "1")
+
+class FormSession:
+    """
+    Keeps one page parked on the configured case-status form (state and
+    court complex already selected). Between cases only the case fields
+    are refilled and the captcha refreshed; `invalidate()` forces the next
+    attempt back through a full reload, e.g. when the session expired.
+    """
+
+    def __init__(self, page):
+        self.page = page
+        self.ready = False
+
+    def invalidate(self):
+        self.ready = False
+
+    def _configured(self):
+        page = self.page
+        if page.locator(BACK_TO_FORM).is_visible():
+            page.locator(BACK_TO_FORM).click()
+        return (page.locator("#case_type").is_visible()
+                and page.eval_on_selector("#sess_state_code", "s => s.value") == "1"
+                and page.eval_on_selector("#court_complex_code", "s => s.value") == "1")
+
+    def open(self, case, timer):
+        """Bring the form to `case`, reusing the live form when possible."""
+        reused = False
+        if self.ready:
+            with timer.step("reuse"):
+                try: reused = self._configured()
+                except Exception: reused = False
+                if reused: self.page.evaluate(CLEAR_RESULTS_JS)
+        if not reused:
+            self.ready = False
+            open_search_form(self.page, timer)
+        fill_case(self.page, case, timer)
+        if reused:
+            with timer.step("captcha_refresh"):
+                self.page.eval_on_selector("#captcha_image", REFRESH_CAPTCHA_JS)
+        self.ready = True
+
+def fill_case(page, case, timer):
+    with timer.step("case_form"):
+        if page.locator("#CScaseNumber").is_visible():
+            page.locator("#CScaseNumber").click()
+        select_when_ready(page, "#case_type", case['value'])
+        page.locator("#search_case_no").fill(case['no'])
+        page.locator("#rgyear").fill(case['year'])
+
+def submit_search(page, code, timer):
+    """Submit the form; returns True when the case table came back."""
+    with timer.step("submit"):
+        page.locator("#captcha").fill(code)
+        page.locator("#goResetDiv input[value='Go']").click()
+        page.wait_for_selector("#dispTable, text=Invalid Captcha", timeout=STEP_TIMEOUT)
+        return not page.locator("text=Invalid Captcha").is_visible()
+
+def open_history(page, timer):
+    with timer.step("history"):
+        page.locator("#dispTable a[onclick*='viewHistory']").first.click()
+        page.wait_for_selector(".order_table", state="visible", timeout=20000)
+        # Only the table travels back from the browser, not the whole page
+        return page.locator(".order_table").first.evaluate("t => t.outerHTML")
+
+def lookup_history(page, case, log, throttle=None, tap=None, form=None):
+    """
+    Navigation half of fetch_case: search form, captcha and history view.
+    Returns the order-table HTML, or False when every retry failed (or the
+    site's circuit breaker opened, see retry_policy).
+    """
+    status = None
+    for attempt in range(1, MAX_RETRIES + 1):
+        if status and not retry_policy.before_retry(throttle, status, attempt - 1, log): break
+        timer = StepTimer()
+        try:
+            if throttle: throttle()
+            if form:
+                try: form.open(case, timer)
+                except:
+                    form.invalidate()
+                    timer.fail("error", "search form did not load")
+                    continue
+            else:
+                try: open_search_form(page, timer)
+                except:
+                    timer.fail("error", "search form did not load")
+                    continue
+                fill_case(page, case, timer)
+
+            # Captcha Logic
+            with timer.step("captcha"):
+                code, captcha_bytes = solve_captcha(page, tap, log)
+            if not code:
+                log("⚠️ Captcha blurry. Retrying with a new one...")
+                timer.fail("blurry")
+                continue
+
+            try: valid = submit_search(page, code, timer)
+            except:
+                # Neither results nor a captcha error: most likely the session expired
+                if form: form.invalidate()
+                timer.fail("timeout", "no search result")
+                continue
+            if not valid:
+                log("❌ Invalid Captcha. Retrying...")
+                timer.fail("invalid_captcha")
+                continue
+            captcha.record(captcha_bytes, code)
+
+            return open_history(page, timer)
+
+        except retry_policy.HostDown as e:
+            log(f"⛔ {e}")
+            timer.fail(retry_policy.DEFERRED)
+        except Exception as e:
+            if form: form.invalidate()
+            log(f"❌ Error: {e}")
+            timer.fail("error", str(e))
+        finally:
+            timer.finish(attempt, log)
+            retry_policy.report(throttle, timer.status)
+            status = timer.status
+
+    return False
+
+
+class OrderLink(NamedTuple):
+    date_str: str
+    url: str
+    fingerprint: str
+
+def plan_order(case, history, log):
+    """
+    Parse half of fetch_case: settles the case when there is nothing to
+    download (no orders, or the latest one is cached) and returns its result;
+    otherwise returns the OrderLink still to be fetched.
+    """
+    date_str, rel_link = get_latest_order_link(history)
+    fingerprint = order_table_fingerprint(history)
+    if not date_str:
+        log("⚠️ No orders found in history.")
+        return settle(case, None, fingerprint, None, log)
+    log(f"📄 Found Link: {date_str}")
+    url = BASE_URL + rel_link
+    cached = cached_order(case, date_str, log, url)
+    if cached: return settle(case, date_str, fingerprint, cached, log)
+    return OrderLink(date_str, url, fingerprint)
+
+def looks_like_pdf(status, content_type, head):
+    """Header check plus the first bytes of the body: the site answers missing files with an HTML page."""
+    return status == 200 and "application/pdf" in content_type and head.startswith(PDF_MAGIC)
+
+def settle_order(case, link, result, log):
+    if result:
+        log("✅ PDF Downloaded Successfully!")
+        return settle(case, link.date_str, link.fingerprint, result, log)
+    # It is an error page. Stop retrying, the file just isn't there
+    log("⚠️ Website Error: Order listed but file is missing/not uploaded.")
+    return settle(case, link.date_str, link.fingerprint, None, log)
+
+def save_order(case, link, status, content_type, body, log):
+    """Download half of fetch_case: keep the response if it really is a PDF."""
+    ok = looks_like_pdf(status, content_type, body[:len(PDF_MAGIC)])
+    return settle_order(case, link, store_order(case, link.date_str, link.url, body) if ok else None, log)
+
+def fetch_case(page, case, log, throttle=None, tap=None, form=None):
+    """
+    Run the case-status flow for one case on an already open page.
+
+    `log` receives progress messages; `throttle` (if given) is called before
+    every navigation so the caller can rate-limit hits on the court site;
+    `tap` is the page's CaptchaTap, if one is attached; `form` is the page's
+    FormSession, if the search form should be reused across cases.
+    Returns a result dict ({"label", "desc", "path"}), or None when there is
+    no PDF to show. Returns False when every retry failed.
+    """
+    history = lookup_history(page, case, log, throttle, tap, form)
+    if history is False: return False
+    link = plan_order(case, history, log)
+    if not isinstance(link, OrderLink): return link
+
+    if throttle: throttle()
+    start = time.perf_counter()
+    response = page.request.get(link.url)
+    body = response.body()
+    record_download(log, time.perf_counter() - start, len(body))
+    return save_order(case, link, response.status, response.headers.get("content-type", ""), body, log)
+
+def lookup_case(page, case, log, throttle=None, tap=None, form=None):
+    """
+    Pipeline entry point: the history HTML plus the page's cookies, so a
+    separate download stage can fetch the PDF in the same site session.
+    Returns False when every retry failed.
+    """
+    history = lookup_history(page, case, log, throttle, tap, form)
+    if history is False: return False
+    return history, {c["name"]: c["value"] for c in page.context.cookies()}
+
+@contextmanager
+def browser_worker(throttle=None, stats=None, lookup_only=False):
+    """
+    Open one isolated browser context and yield a `handle(case, log)` callable
+    bound to it. Each worker thread owns its own Playwright instance, since the
+    sync API cannot be shared across threads. With `lookup_only` the handle
+    is lookup_case instead of fetch_case.
+    """
+    from playwright.sync_api import sync_playwright
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=True, args=BROWSER_ARGS)
+        try:
+            context = browser.new_context(user_agent=USER_AGENT)
+            ResourcePolicy().attach(context).stats = stats
+            page = context.new_page()
+            prepare_page(page)
+            tap = CaptchaTap(page)
+            form = FormSession(page) if REUSE_FORM_SESSION else None
+            fetch = lookup_case if lookup_only else fetch_case
+            yield lambda case, log: fetch(page, case, log, throttle, tap, form)
+        finally:
+            browser.close()
@@ -0,0 +1,129 @@
+import csv
+import io
+import json
+import threading
+import time
+from datetime import datetime
+
+# Columns of every span row, in export order
+FIELDS = ("run", "case", "attempt", "span", "ms", "status", "reason", "bytes")
+
+
+class CaseLog:
+    """
+    The per-case `log` callable the pools hand to workers: collects
+    (datetime, message) lines and carries the case's CaseTrace, if tracing is
+    on, so fetch code can report spans without another parameter.
+    """
+
+    def __init__(self, lines, trace=None):
+        self.lines = lines
+        self.trace = trace
+
+    def __call__(self, msg):
+        self.lines.append((datetime.now(), msg))
+
+def trace_of(log):
+    return getattr(log, "trace", None)
+
+
+class CaseTrace:
+    """Spans for one case: each step of each attempt, the attempts, and the case itself."""
+
+    def __init__(self, tracer, label):
+        self.tracer = tracer
+        self.label = label
+        self.started = None
+        self.attempts = 0
+
+    def begin(self):
+        if self.started is None: self.started = time.perf_counter()
+
+    def span(self, name, secs, attempt=0, status="ok", reason="", nbytes=0):
+        self.tracer._add(case=self.label, attempt=attempt, span=name, ms=round(secs * 1000, 1),
+                         status=status, reason=reason, bytes=nbytes)
+
+    def attempt(self, attempt, steps, status, reason=""):
+        self.attempts = max(self.attempts, attempt)
+        for name, secs in steps:
+            self.span(name, secs, attempt)
+        self.span("attempt", sum(secs for _, secs in steps), attempt, status, reason)
+
+    def end(self, result):
+        status = "failed" if result is False else "ok" if result else "empty"
+        secs = time.perf_counter() - self.started if self.started else 0.0
+        self.span("case", secs, self.attempts, status)
+
+
+class Tracer:
+    """Span rows for one batch run, exportable as JSON lines or CSV, with a per-step summary."""
+
+    def __init__(self, run=None):
+        self.run = run or datetime.now().strftime("%Y%m%d-%H%M%S")
+        self.spans = []
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_jsonl(cls, text):
+        """A tracer holding previously exported spans (e.g. a finished job's)."""
+        spans = [json.loads(line) for line in text.splitlines() if line.strip()]
+        tracer = cls(spans[0]["run"] if spans else None)
+        tracer.spans = spans
+        return tracer
+
+    def case(self, case):
+        label = f"{case['name']} {case['no']}/{case['year']}" if isinstance(case, dict) else str(case)
+        return CaseTrace(self, label)
+
+    def _add(self, **span):
+        span["run"] = self.run
+        with self._lock:
+            self.spans.append(span)
+
+    def jsonl(self):
+        return "".join(json.dumps({k: span[k] for k in FIELDS}) + "\n" for span in self.spans)
+
+    def csv(self):
+        out = io.StringIO()
+        writer = csv.DictWriter(out, FIELDS)
+        writer.writeheader()
+        writer.writerows(self.spans)
+        return out.getvalue()
+
+    def summary(self):
+        """One row per span name: count, failures, p50/p95/max ms, bytes."""
+        by_name = {}
+        for span in self.spans:
+            by_name.setdefault(span["span"], []).append(span)
+        rows = []
+        for name, spans in by_name.items():
+            ms = sorted(s["ms"] for s in spans)
+            rows.append({
+                "step": name,
+                "count": len(spans),
+                "failed": sum(s["status"] not in ("ok", "empty") for s in spans),
+                "p50 ms": ms[len(ms) // 2],
+                "p95 ms": ms[min(len(ms) - 1, int(len(ms) * 0.95))],
+                "max ms": ms[-1],
+                "bytes": sum(s["bytes"] for s in spans),
+            })
+        return rows
+
+    def captcha_success_rate(self):
+        """
+        Share of submitted captchas the site accepted: attempts that got past
+        the search versus those rejected as invalid (None before any submit).
+        """
+        statuses = [s["status"] for s in self.spans if s["span"] == "attempt"]
+        accepted = sum(s == "ok" for s in statuses)
+        submitted = accepted + statuses.count("invalid_captcha")
+        return accepted / submitted if submitted else None
+
+    def failures(self):
+        """Count of attempts per failure reason."""
+        counts = {}
+        for span in self.spans:
+            if span["span"] == "attempt" and span["status"] != "ok":
+                key = span["reason"] or span["status"]
+                counts[key] = counts.get(key, 0) + 1
+        return counts
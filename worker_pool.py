@@ -0,0 +1,308 @@
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Callable, NamedTuple, Optional
+from urllib.parse import urlparse
+from retry_policy import CircuitBreaker, HostDown
+from tracing import CaseLog
+
+
+class RateLimiter:
+    """Politeness limiter: spaces calls to `wait()` at least `interval` seconds apart."""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+class NetStats:
+    """Thread-safe per-run network counters shared by all workers."""
+
+    def __init__(self):
+        self.requests = 0
+        self.blocked = 0
+        self.bytes = 0
+        self._lock = threading.Lock()
+
+    def add(self, size=0, blocked=False):
+        with self._lock:
+            if blocked: self.blocked += 1
+            else: self.requests += 1
+            self.bytes += size
+
+    def summary(self):
+        return f"{self.requests} requests, {self.blocked} blocked, {self.bytes / (1024 * 1024):.2f} MiB transferred"
+
+
+class HostThrottle:
+    """
+    The `throttle()` callable workers get: raises retry_policy.HostDown
+    while the host's circuit breaker is open (so the case is deferred
+    instead of queueing up behind the cooldown), then waits for the rate
+    limiter. Attempt outcomes are reported to `breaker` (see
+    retry_policy.report).
+    """
+
+    def __init__(self, limiter, breaker):
+        self.limiter = limiter
+        self.breaker = breaker
+
+    def __call__(self):
+        if not self.breaker.allow(): raise HostDown()
+        self.limiter.wait()
+
+
+class HostGate:
+    """Per-host concurrency cap, rate limiter and circuit breaker, shared by all workers."""
+
+    def __init__(self, max_per_host, interval):
+        self.max_per_host = max_per_host
+        self.interval = interval
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def _host(self, url):
+        host = urlparse(url).netloc
+        with self._lock:
+            if host not in self._hosts:
+                self._hosts[host] = (threading.BoundedSemaphore(self.max_per_host),
+                                     HostThrottle(RateLimiter(self.interval), CircuitBreaker()))
+            return self._hosts[host]
+
+    def slot(self, url):
+        return self._host(url)[0]
+
+    def throttle(self, url):
+        return self._host(url)[1]
+
+    def breaker(self, url):
+        return self._host(url)[1].breaker
+
+
+def run_pool(items, worker_factory, workers=1, slot=None, tracer=None):
+    """
+    Process `items` on `workers` threads pulling from a shared queue.
+
+    `worker_factory()` is a context manager run once per thread; it yields a
+    `handle(item, log)` callable (e.g. one browser context per thread).
+    `slot` is an optional semaphore held around each item (per-host cap).
+    `tracer` is an optional tracing.Tracer collecting spans per item.
+
+    Yields `(item, result, log_lines)` strictly in input order, where
+    `log_lines` is a list of `(datetime, message)` tuples. Items that were
+    never handled (every worker failed to start) come back with result False.
+    """
+    items = list(items)
+    jobs = queue.Queue()
+    for idx, item in enumerate(items):
+        jobs.put((idx, item))
+
+    done = {}
+    cond = threading.Condition()
+
+    def finish(idx, result, lines):
+        with cond:
+            done[idx] = (result, lines)
+            cond.notify_all()
+
+    def worker():
+        try:
+            with worker_factory() as handle:
+                while True:
+                    try: idx, item = jobs.get_nowait()
+                    except queue.Empty: return
+                    lines = []
+                    log = CaseLog(lines, tracer.case(item) if tracer else None)
+                    if log.trace: log.trace.begin()
+                    try:
+                        if slot:
+                            with slot: result = handle(item, log)
+                        else:
+                            result = handle(item, log)
+                    except Exception as e:
+                        log(f"❌ Error: {e}")
+                        result = False
+                    if log.trace: log.trace.end(result)
+                    finish(idx, result, lines)
+        except Exception as e:
+            # Worker could not start (or crashed between items); the queue is
+            # left to the remaining workers.
+            with cond:
+                startup_errors.append(e)
+                cond.notify_all()
+
+    startup_errors = []
+    threads = [threading.Thread(target=worker, daemon=True)
+               for _ in range(max(1, min(workers, len(items))))]
+    for t in threads: t.start()
+
+    for idx, item in enumerate(items):
+        with cond:
+            while idx not in done:
+                if not any(t.is_alive() for t in threads):
+                    err = startup_errors[-1] if startup_errors else "worker stopped"
+                    done[idx] = (False, [(datetime.now(), f"❌ Error: {err}")])
+                    break
+                cond.wait(timeout=0.5)
+            result, lines = done.pop(idx)
+        yield item, result, lines
+
+    for t in threads: t.join()
+
+
+class Next(NamedTuple):
+    """Returned by a pipeline stage to hand `payload` on to the next stage."""
+    payload: object
+
+
+class Stage(NamedTuple):
+    """
+    One pipeline stage: `worker_factory()` is a context manager run once per
+    thread yielding `handle(payload, log)`, as in run_pool. The handle
+    returns Next(payload) to pass the item downstream, anything else is the
+    item's final result. `queue_size` bounds the stage's inbox, so a slow
+    stage pushes back on the one feeding it.
+    """
+    name: str
+    worker_factory: Callable
+    workers: int = 1
+    queue_size: int = 4
+    slot: Optional[object] = None
+
+
+class PipelineStats:
+    """Per-stage counters: items handled, busy time, inbox depth and time upstream spent blocked on it."""
+
+    def __init__(self):
+        self.stages = {}
+        self._queues = {}
+        self._lock = threading.Lock()
+
+    def _register(self, name, inbox):
+        with self._lock:
+            self.stages[name] = {"done": 0, "busy": 0.0, "peak": 0, "blocked": 0.0}
+            self._queues[name] = inbox
+
+    def _add(self, name, **deltas):
+        with self._lock:
+            row = self.stages[name]
+            for key, value in deltas.items():
+                row[key] = max(row[key], value) if key == "peak" else row[key] + value
+
+    def depths(self):
+        """Current inbox depth per stage."""
+        return {name: q.qsize() for name, q in self._queues.items()}
+
+    def summary(self):
+        with self._lock:
+            return " · ".join(
+                f"{name} {row['done']} done, {row['busy']:.1f}s busy, peak queue {row['peak']}, "
+                f"{row['blocked']:.1f}s backpressure" for name, row in self.stages.items())
+
+
+def run_pipeline(items, stages, stats=None, tracer=None):
+    """
+    Push `items` through `stages` (a list of Stage), each stage on its own
+    threads with a bounded queue in front of it, so e.g. downloads for one
+    case overlap navigation for the next.
+
+    Yields `(item, result, log_lines)` strictly in input order, like
+    run_pool (`tracer` too). Items reaching a stage with no live workers
+    left come back with result False.
+    """
+    items = list(items)
+    stats = stats or PipelineStats()
+    # The first stage reads a pre-filled queue; the others are bounded
+    inboxes = [queue.Queue()] + [queue.Queue(maxsize=s.queue_size) for s in stages[1:]]
+    for stage, inbox in zip(stages, inboxes):
+        stats._register(stage.name, inbox)
+    logs = [CaseLog([], tracer.case(item) if tracer else None) for item in items]
+    for idx, item in enumerate(items):
+        inboxes[0].put((idx, item))
+
+    done = {}
+    cond = threading.Condition()
+    counts = [max(1, min(s.workers, len(items))) for s in stages]
+    running = list(counts)
+    finished = [threading.Event() for _ in stages]
+
+    def finish(idx, result):
+        if logs[idx].trace: logs[idx].trace.end(result)
+        with cond:
+            done[idx] = result
+            cond.notify_all()
+
+    def consume(level, handle, error=None):
+        stage, inbox = stages[level], inboxes[level]
+        while True:
+            try: idx, payload = inbox.get(timeout=0.1)
+            except queue.Empty:
+                if level == 0 or finished[level - 1].is_set():
+                    if inbox.empty(): return
+                continue
+            log = logs[idx]
+            if level == 0 and log.trace: log.trace.begin()
+            if handle is None:
+                log(f"❌ Error: {error or 'worker stopped'}")
+                finish(idx, False)
+                continue
+            start = time.perf_counter()
+            try:
+                if stage.slot:
+                    with stage.slot: result = handle(payload, log)
+                else:
+                    result = handle(payload, log)
+            except Exception as e:
+                log(f"❌ Error: {e}")
+                result = False
+            stats._add(stage.name, done=1, busy=time.perf_counter() - start)
+            if isinstance(result, Next) and level + 1 < len(stages):
+                downstream = inboxes[level + 1]
+                blocked = time.perf_counter()
+                downstream.put((idx, result.payload))
+                stats._add(stages[level + 1].name, peak=downstream.qsize(),
+                           blocked=time.perf_counter() - blocked)
+            else:
+                finish(idx, result.payload if isinstance(result, Next) else result)
+
+    def worker(level):
+        error = None
+        try:
+            with stages[level].worker_factory() as handle:
+                consume(level, handle)
+        except Exception as e:
+            error = e
+        finally:
+            with cond:
+                running[level] -= 1
+                last = running[level] == 0
+            # Nobody left to serve this stage: fail whatever still arrives
+            if last:
+                consume(level, None, error)
+                finished[level].set()
+
+    threads = [threading.Thread(target=worker, args=(level,), daemon=True)
+               for level, count in enumerate(counts) for _ in range(count)]
+    for t in threads: t.start()
+
+    for idx, item in enumerate(items):
+        with cond:
+            while idx not in done:
+                if not any(t.is_alive() for t in threads):
+                    done[idx] = False
+                    break
+                cond.wait(timeout=0.5)
+            result = done.pop(idx)
+        yield item, result, logs[idx].lines
+
+    for t in threads: t.join()